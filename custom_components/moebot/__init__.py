@@ -2,41 +2,178 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
 from datetime import datetime
 
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.config_entries import ConfigEntry, SOURCE_INTEGRATION_DISCOVERY
 from homeassistant.const import Platform, EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryError
+from homeassistant.helpers import discovery_flow, entity_registry as er
 from homeassistant.helpers.entity import Entity, DeviceInfo
+from homeassistant.helpers.event import async_call_later
 
-from pymoebot import MoeBot
-
-from .const import DOMAIN
-from .config_flow import ConfigFlow as cf
+from .const import DOMAIN, IP_ADDRESS, TUYA_VERSION, SNAPSHOT, CONF_LAST_MESSAGE_ATTRIBUTE, \
+    DEFAULT_LAST_MESSAGE_ATTRIBUTE, CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL, \
+    CONF_DOCKED_HEARTBEAT_INTERVAL, DEFAULT_DOCKED_HEARTBEAT_INTERVAL, CONF_IDLE_MODE, DEFAULT_IDLE_MODE
+from .battery import MoeBotBatteryPredictor
+from .config_flow import ConfigFlow as cf, async_pop_validated_device
+from .device import MoeBotDevice
+from .discovery import DiscoveredDevices, async_get_discovered_devices
+from .dispatcher import MoeBotDispatcher
+from .sessions import MoeBotSessionTracker, async_remove_sessions
+from .snapshot import MoeBotSnapshotStore
+from .statistics import MoeBotStatistics
+from .state_machine import MoeBotStateMachine
+from .zones import MoeBotZoneWriter
 
 PLATFORMS: list[Platform] = [Platform.LAWN_MOWER, Platform.SENSOR, Platform.NUMBER, Platform.SWITCH, Platform.BUTTON]
 _log = logging.getLogger(__package__)
 
+# How long to show a requested value before giving up on the MoeBot reporting it
+ACKNOWLEDGE_TIMEOUT = 15  # seconds
+
+_NOT_PENDING = object()
+
+
+@dataclass
+class MoeBotData:
+    """The objects shared by all the entities of a MoeBot config entry."""
+    moebot: MoeBotDevice
+    dispatcher: MoeBotDispatcher
+    state_machine: MoeBotStateMachine
+    zone_writer: MoeBotZoneWriter
+    battery_predictor: MoeBotBatteryPredictor
+    snapshot_store: MoeBotSnapshotStore
+    sessions: MoeBotSessionTracker
+    # Only kept when the recorder is loaded
+    statistics: MoeBotStatistics | None
+    # The options the entry was set up with
+    options: Mapping[str, Any]
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up MoeBot from a config entry."""
-    moebot = await hass.async_add_executor_job(MoeBot, entry.data["device_id"], entry.data["ip_address"],
-                                               entry.data["local_key"])
+    # Listen for devices announcing themselves for as long as the entry is loaded; this finds the MoeBot when its IP
+    # address is 'Auto' and offers to add any other MoeBots that are heard
+    discovered = await async_get_discovered_devices(hass)
+    entry.async_on_unload(discovered.release)
+    entry.async_on_unload(discovered.add_listener(_async_offer_discovered_device(hass, entry, discovered)))
+
+    snapshot_store = MoeBotSnapshotStore(hass, entry.data["device_id"])
+
+    # When the entry has just been added or reconfigured, the connection made to validate it is still open
+    moebot = async_pop_validated_device(hass, entry.data["device_id"])
+    if moebot is None:
+        # The local key is the AES key, there's no point trying to connect with one that can't be
+        if len(entry.data["local_key"]) != 16:
+            raise ConfigEntryError("The local key must be 16 characters long, reconfigure the MoeBot")
+
+        # Unless a version has been chosen, start with the version that worked last time rather than probing
+        tuya_version = entry.data.get(TUYA_VERSION, "auto")
+        moebot = MoeBotDevice(entry.data["device_id"], entry.data["ip_address"], entry.data["local_key"],
+                              tuya_version=None if tuya_version == "auto" else float(tuya_version),
+                              preferred_tuya_version=entry.data.get(SNAPSHOT, {}).get(TUYA_VERSION),
+                              ip_resolver=discovered.async_find_ip)
+        # The entities start from what was known when the MoeBot was last connected to, while it is connected to in
+        # the background; an unreachable MoeBot doesn't hold up the start of Home Assistant
+        moebot.restore(await snapshot_store.async_load() or entry.data.get(SNAPSHOT, {}))
+    entry.async_on_unload(snapshot_store.async_track(moebot))
+    entry.async_on_unload(moebot.add_address_listener(_async_address_changed(hass, entry, moebot)))
+    entry.async_on_unload(moebot.add_listener(_async_remember_version(hass, entry, moebot)))
+
+    # The MoeBot is back on the network, so don't wait out the back off to reconnect to it
+    entry.async_on_unload(discovered.add_beacon_listener(moebot.id, lambda device: moebot.reconnect_now(device["ip"])))
+
+    moebot.configure_heartbeat(entry.options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+                               entry.options.get(CONF_DOCKED_HEARTBEAT_INTERVAL, DEFAULT_DOCKED_HEARTBEAT_INTERVAL),
+                               entry.options.get(CONF_IDLE_MODE, DEFAULT_IDLE_MODE))
+
     _log.info("Created a moebot: %r" % moebot)
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = moebot
-    await hass.async_add_executor_job(moebot.listen)
+    dispatcher = MoeBotDispatcher(moebot)
+    state_machine = MoeBotStateMachine(dispatcher)
+    sessions = MoeBotSessionTracker(hass, dispatcher)
+    await sessions.async_load()
+    statistics = None
+    if "recorder" in hass.config.components:
+        statistics = MoeBotStatistics(hass, dispatcher)
+        await statistics.async_load()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = MoeBotData(moebot, dispatcher, state_machine,
+                                                                  MoeBotZoneWriter(hass, dispatcher),
+                                                                  MoeBotBatteryPredictor(dispatcher),
+                                                                  snapshot_store, sessions, statistics,
+                                                                  entry.options.copy())
+    moebot.listen()
 
-    def shutdown_moebot(event):
+    async def shutdown_moebot(event):
         _log.debug("In the shutdown callback")
-        moebot.unlisten()
+        await moebot.async_unlisten()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown_moebot))
 
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown_moebot)
+    # Reload the entry when its options are changed
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
 
+def _async_offer_discovered_device(hass: HomeAssistant, entry: ConfigEntry, discovered: DiscoveredDevices):
+    """Return a listener that starts a discovery flow for each new device of the same product as this MoeBot.
+
+    Every Tuya device on the network announces itself, so only devices with the same product key as this entry's
+    MoeBot are offered.
+    """
+
+    @callback
+    def _device_announced(device: dict) -> None:
+        own = discovered.get(entry.data["device_id"])
+        if (own is None or device["id"] == own["id"] or not device.get("product_key")
+                or device["product_key"] != own.get("product_key")):
+            return
+        discovery_flow.async_create_flow(hass, DOMAIN, {"source": SOURCE_INTEGRATION_DISCOVERY}, device)
+
+    return _device_announced
+
+
+def _async_remember_version(hass: HomeAssistant, entry: ConfigEntry, moebot: MoeBotDevice):
+    """Return a listener that remembers the Tuya version that worked in the entry, to try it first next time."""
+
+    @callback
+    def _message_received(raw_msg) -> None:
+        if moebot.tuya_version is not None and moebot.tuya_version != entry.data.get(SNAPSHOT, {}).get(TUYA_VERSION):
+            _log.info("Remembering Tuya version %s for %s", moebot.tuya_version, moebot.id)
+            hass.config_entries.async_update_entry(entry, data={**entry.data, SNAPSHOT: moebot.snapshot})
+
+    return _message_received
+
+
+def _async_address_changed(hass: HomeAssistant, entry: ConfigEntry, moebot: MoeBotDevice):
+    """Return a listener that remembers the MoeBot's new IP address in the entry."""
+
+    @callback
+    def _address_changed(ip: str) -> None:
+        data = {**entry.data, SNAPSHOT: moebot.snapshot}
+        # An 'Auto' address is looked up every time, so it is kept
+        if entry.data[IP_ADDRESS] != "Auto":
+            data[IP_ADDRESS] = ip
+        hass.config_entries.async_update_entry(entry, data=data)
+
+    return _address_changed
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options have changed."""
+    # The entry's data is also updated while it is loaded, such as when the MoeBot moves to a new IP address, which
+    # doesn't need a reload
+    data: MoeBotData = hass.data[DOMAIN][entry.entry_id]
+    if entry.options != data.options:
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Migrate old config entries to remove the deprecated entity entirely."""
     _log.info("Migrating configuration from version %s", config_entry.version)
@@ -61,11 +198,26 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot and sessions of a MoeBot when its config entry is removed."""
+    await MoeBotSnapshotStore(hass, entry.data["device_id"]).async_remove()
+    await async_remove_sessions(hass, entry.data["device_id"])
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        moebot = hass.data[DOMAIN][entry.entry_id]
-        moebot.unlisten()
+        data: MoeBotData = hass.data[DOMAIN][entry.entry_id]
+        data.zone_writer.async_shutdown()
+        data.battery_predictor.async_shutdown()
+        data.sessions.async_shutdown()
+        if data.statistics is not None:
+            data.statistics.async_shutdown()
+        data.dispatcher.async_shutdown()
+        await data.moebot.async_unlisten()
+        # Saving now also drops the saves waiting to be made, and the MoeBot with them
+        await data.snapshot_store.async_save(data.moebot)
+        await data.sessions.async_save()
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
@@ -74,8 +226,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 class BaseMoeBotEntity(Entity):
     """The abstract base device for all MoeBot entities."""
 
-    def __init__(self, moebot: MoeBot):
-        self._moebot = moebot
+    # The Tuya data points (DPS) that this entity's state is derived from. The entity is only written to HA when
+    # a message carries one of these (or when the MoeBot's availability changes). None means every message.
+    _dps: tuple[str, ...] | None = ()
+
+    # The time of the last message changes with every heartbeat, don't keep it in the recorder
+    _unrecorded_attributes = frozenset({"last_message_received"})
+
+    def __init__(self, dispatcher: MoeBotDispatcher):
+        self._dispatcher = dispatcher
+        self._moebot: MoeBotDevice = dispatcher.moebot
 
         # MoeBot class is LOCAL PUSH, so we tell HA that it should not be polled
         self._attr_should_poll = False
@@ -88,6 +248,10 @@ class BaseMoeBotEntity(Entity):
 
     @property
     def extra_state_attributes(self):
+        # Providing the time of the last message on every entity is opt-in, the LastMessageSensor provides it by
+        # default.
+        if not self.platform.config_entry.options.get(CONF_LAST_MESSAGE_ATTRIBUTE, DEFAULT_LAST_MESSAGE_ATTRIBUTE):
+            return None
         if self._moebot.last_update is not None:
             return {"last_message_received": datetime.fromtimestamp(self._moebot.last_update)}
         return None
@@ -97,13 +261,87 @@ class BaseMoeBotEntity(Entity):
 
         # The call back registration is done once this entity is registered with HA
         # (rather than in the __init__)
-        def listener(raw_msg):
-            _log.debug("%r got an update: %r" % (self.__class__.__name__, raw_msg))
-            # self.async_write_ha_state()
-            self.schedule_update_ha_state()
+        self.async_on_remove(self._dispatcher.async_add_listener(self._handle_update, self._dps))
 
-        self._moebot.add_listener(listener)
+    @callback
+    def _handle_update(self, raw_msg) -> None:
+        """Write the new state to HA; the dispatcher calls this on the event loop."""
+        _log.debug("%r got an update: %r" % (self.__class__.__name__, raw_msg))
+        self.async_write_ha_state()
 
     @property
     def available(self) -> bool:
-        return self._moebot.online
+        return self._moebot.available
+
+
+class OptimisticMoeBotEntity(BaseMoeBotEntity):
+    """A MoeBot entity that shows a requested value straight away, rather than once the MoeBot reports it.
+
+    The requested value is shown, with a pending attribute, until the MoeBot reports it. If the MoeBot hasn't reported
+    it within the ACKNOWLEDGE_TIMEOUT, or the request fails, the entity goes back to the value the MoeBot reported.
+    """
+
+    _unrecorded_attributes = BaseMoeBotEntity._unrecorded_attributes | {"pending"}
+
+    def __init__(self, dispatcher: MoeBotDispatcher):
+        super().__init__(dispatcher)
+        self._pending_value: Any = _NOT_PENDING
+        self._cancel_rollback: Callable[[], None] | None = None
+
+    @property
+    def _reported_value(self) -> Any:
+        """Return the value last reported by the MoeBot."""
+        raise NotImplementedError
+
+    @property
+    def _optimistic_value(self) -> Any:
+        """Return the value requested, if the MoeBot hasn't reported it yet, otherwise the value reported."""
+        if self._pending_value is not _NOT_PENDING:
+            return self._pending_value
+        return self._reported_value
+
+    @property
+    def extra_state_attributes(self):
+        attributes = super().extra_state_attributes
+        if self._pending_value is not _NOT_PENDING:
+            attributes = {**(attributes or {}), "pending": True}
+        return attributes
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._clear_pending)
+
+    async def _async_request_value(self, value: Any, request: Awaitable[None]) -> None:
+        """Show value while request asks the MoeBot for it."""
+        self._clear_pending()
+        self._pending_value = value
+        self._cancel_rollback = async_call_later(self.hass, ACKNOWLEDGE_TIMEOUT, self._rollback)
+        self.async_write_ha_state()
+        try:
+            await request
+        except Exception:
+            self._clear_pending()
+            self.async_write_ha_state()
+            raise
+
+    @callback
+    def _handle_update(self, raw_msg) -> None:
+        if self._pending_value is not _NOT_PENDING and self._reported_value == self._pending_value:
+            _log.debug("%r has been acknowledged: %r", self.__class__.__name__, self._pending_value)
+            self._clear_pending()
+        super()._handle_update(raw_msg)
+
+    @callback
+    def _rollback(self, _now) -> None:
+        _log.warning("The MoeBot didn't acknowledge %r for %s, showing the value it reported",
+                     self._pending_value, self.entity_id)
+        self._cancel_rollback = None
+        self._clear_pending()
+        self.async_write_ha_state()
+
+    @callback
+    def _clear_pending(self) -> None:
+        self._pending_value = _NOT_PENDING
+        if self._cancel_rollback is not None:
+            self._cancel_rollback()
+            self._cancel_rollback = None
@@ -0,0 +1,113 @@
+"""Predicts how long a MoeBot's battery will last, or take to charge, from how quickly it has been changing."""
+from __future__ import annotations
+
+import logging
+import time
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import DPS_BATTERY, DPS_BATTERY_ALT, DPS_STATE
+from .dispatcher import MoeBotDispatcher
+from .sessions import MOWING_STATES
+
+_log = logging.getLogger(__package__)
+
+CHARGING_STATES = ("CHARGING", "CHARGING_WITH_TASK_SUSPEND")
+
+# How much each battery reading counts for compared to the one before it; older readings are slowly forgotten
+SLOPE_DECAY = 0.9
+
+
+class _SlopeEstimator:
+    """An exponentially weighted least squares fit of the battery level against time, for one state.
+
+    Only the running sums of the fit are kept, so each reading takes the same time and memory however many there
+    have been. The fit starts again each time the state is entered, as the time out of the state would skew it; the
+    slope found in the last visit is used until the new fit has two readings to go on.
+    """
+
+    def __init__(self) -> None:
+        self.slope: float | None = None  # percent per second
+        self._origin: float | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._weight = self._t = self._b = self._tt = self._tb = 0.0
+
+    def start(self) -> None:
+        self._origin = None
+        self._reset()
+
+    def add(self, when: float, battery: int) -> None:
+        # Times are taken from the first reading, to keep the sums small
+        if self._origin is None:
+            self._origin = when
+        t = when - self._origin
+        self._weight = SLOPE_DECAY * self._weight + 1
+        self._t = SLOPE_DECAY * self._t + t
+        self._b = SLOPE_DECAY * self._b + battery
+        self._tt = SLOPE_DECAY * self._tt + t * t
+        self._tb = SLOPE_DECAY * self._tb + t * battery
+
+        variance = self._weight * self._tt - self._t * self._t
+        if variance > 0:
+            self.slope = (self._weight * self._tb - self._t * self._b) / variance
+
+
+class MoeBotBatteryPredictor:
+    """Learns how quickly the MoeBot's battery changes in each state, to estimate the time until it is empty or full.
+
+    The MoeBot only reports its battery in whole percent, as it changes, so each reading is a point on a line the
+    fit follows. What has been learnt is kept in memory, the estimates are unknown until the MoeBot has been seen
+    to use or charge its battery since Home Assistant started.
+    """
+
+    def __init__(self, dispatcher: MoeBotDispatcher) -> None:
+        self._moebot = dispatcher.moebot
+        self._estimators: dict[str, _SlopeEstimator] = {}
+        self._state: str | None = None
+        self._battery: int | None = None
+
+        # Registered before the entities, so that they show the new estimates
+        self._remove_listener: CALLBACK_TYPE = dispatcher.async_add_listener(
+            self._received, (DPS_BATTERY, DPS_BATTERY_ALT, DPS_STATE))
+
+    @callback
+    def async_shutdown(self) -> None:
+        self._remove_listener()
+
+    @property
+    def minutes_remaining(self) -> float | None:
+        """Return the minutes of mowing left in the battery, while the MoeBot is mowing."""
+        slope = self._slope(MOWING_STATES)
+        if slope is None or slope >= 0 or self._moebot.battery is None:
+            return None
+        return self._moebot.battery / -slope / 60
+
+    @property
+    def minutes_to_full(self) -> float | None:
+        """Return the minutes until the battery is full, while the MoeBot is charging."""
+        slope = self._slope(CHARGING_STATES)
+        if slope is None or slope <= 0 or self._moebot.battery is None:
+            return None
+        return (100 - self._moebot.battery) / slope / 60
+
+    def _slope(self, states: tuple[str, ...]) -> float | None:
+        if self._state not in states or self._state not in self._estimators:
+            return None
+        return self._estimators[self._state].slope
+
+    @callback
+    def _received(self, raw_msg) -> None:
+        # The MoeBot has applied the whole message, even when it carries the battery and the state together
+        state, battery = self._moebot.state, self._moebot.battery
+        if state != self._state:
+            self._state = state
+            self._estimators.setdefault(state, _SlopeEstimator()).start()
+        elif battery == self._battery:
+            return
+        self._battery = battery
+        if battery is not None:
+            estimator = self._estimators[state]
+            estimator.add(time.monotonic(), battery)
+            _log.debug("Battery slope while %s: %s%%/s", state, estimator.slope)
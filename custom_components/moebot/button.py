@@ -7,15 +7,15 @@ from .const import DOMAIN
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Add sensors for passed config_entry in HA."""
-    moebot = hass.data[DOMAIN][config_entry.entry_id]
+    dispatcher = hass.data[DOMAIN][config_entry.entry_id].dispatcher
 
-    async_add_entities([PollDeviceButton(moebot)])
+    async_add_entities([PollDeviceButton(dispatcher)])
 
 
 class PollDeviceButton(BaseMoeBotEntity, ButtonEntity):
 
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -26,5 +26,5 @@ class PollDeviceButton(BaseMoeBotEntity, ButtonEntity):
         self._attr_device_class = ButtonDeviceClass.UPDATE
         self._attr_name = "Poll Device"
 
-    def press(self) -> None:
-        self._moebot.poll()
+    async def async_press(self) -> None:
+        await self._moebot.async_poll()
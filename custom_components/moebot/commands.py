@@ -0,0 +1,85 @@
+"""Serialises the writes made to a MoeBot's data points."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from pymoebot import MoeBotConnectionError
+
+_log = logging.getLogger(__package__)
+
+# The shortest time between writes to the MoeBot; writes asked for meanwhile wait their turn, and a later write to a
+# data point that is still waiting replaces the value waiting
+COMMAND_INTERVAL = 0.2  # seconds
+
+
+class CommandQueue:
+    """Writes data points to a device one at a time, in the order they were asked for.
+
+    A write to a data point that is still waiting to be sent replaces the value waiting, rather than being queued
+    behind it; dragging a slider only sends the value it was let go at. Everyone that asked for the data point to be
+    written is told once the final value has been sent.
+    """
+
+    def __init__(self, write: Callable[[dict[str, Any]], None], interval: float = COMMAND_INTERVAL) -> None:
+        self._write = write
+        self._interval = interval
+        # The value waiting to be written to each data point, when it was first queued and who is waiting for it
+        self._pending: dict[str, tuple[Any, float, asyncio.Future]] = {}
+        self._worker: asyncio.Task | None = None
+        self._latency: float | None = None
+
+    @property
+    def depth(self) -> int:
+        """Return the number of data points waiting to be written."""
+        return len(self._pending)
+
+    @property
+    def latency(self) -> float | None:
+        """Return how long, in seconds, the last write waited in the queue."""
+        return self._latency
+
+    async def async_put(self, dps: str, value: Any) -> None:
+        """Queue a write to a data point, returning once it has been sent."""
+        loop = asyncio.get_running_loop()
+        if dps in self._pending:
+            _, queued, future = self._pending[dps]
+            _log.debug("Replacing the queued write of %s with %r", dps, value)
+        else:
+            queued, future = loop.time(), loop.create_future()
+        self._pending[dps] = (value, queued, future)
+
+        if self._worker is None:
+            self._worker = loop.create_task(self._async_drain(), name="moebot command queue")
+        # Shielded, so that one caller giving up doesn't cancel the write for the others
+        await asyncio.shield(future)
+
+    def clear(self) -> None:
+        """Drop the writes that haven't been sent."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        pending, self._pending = self._pending, {}
+        for _, _, future in pending.values():
+            if not future.done():
+                future.set_exception(MoeBotConnectionError("The write was dropped before it was sent"))
+
+    async def _async_drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                dps = next(iter(self._pending))
+                value, queued, future = self._pending.pop(dps)
+                try:
+                    self._write({dps: value})
+                except Exception as err:
+                    future.set_exception(err)
+                else:
+                    self._latency = loop.time() - queued
+                    future.set_result(None)
+                await asyncio.sleep(self._interval)
+        finally:
+            if self._worker is asyncio.current_task():
+                self._worker = None
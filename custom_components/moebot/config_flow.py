@@ -6,19 +6,31 @@ import ipaddress
 import logging
 import pymoebot
 import voluptuous as vol
-from functools import partial
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.selector import selector
-from pymoebot import MoeBot
 from typing import Any
 
-from .const import DEVICE_ID, DOMAIN, IP_ADDRESS, LOCAL_KEY, TUYA_VERSION
+from .const import DEVICE_ID, DOMAIN, IP_ADDRESS, LOCAL_KEY, TUYA_VERSION, SNAPSHOT, CONF_LAST_MESSAGE_ATTRIBUTE, \
+    CONF_LAST_MESSAGE_THROTTLE, DEFAULT_LAST_MESSAGE_ATTRIBUTE, DEFAULT_LAST_MESSAGE_THROTTLE, \
+    CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL, CONF_DOCKED_HEARTBEAT_INTERVAL, \
+    DEFAULT_DOCKED_HEARTBEAT_INTERVAL, CONF_IDLE_MODE, DEFAULT_IDLE_MODE
+from .device import MoeBotDevice
+from .discovery import DISCOVERY_TIMEOUT, async_get_discovered_devices
 
 _LOGGER = logging.getLogger(__name__)
 
+# The connections made while validating devices, waiting to be taken over by async_setup_entry
+VALIDATED_DEVICES = f"{DOMAIN}_validated_devices"
+# How long to keep a validated connection open for async_setup_entry
+VALIDATED_DEVICE_TIMEOUT = 60  # seconds
+
+# Once a new MoeBot has been found, how long to wait for others before finishing
+DISCOVERY_SETTLE_TIME = 2  # seconds
+
 TUYA_VERSION_OPTIONS = {
     "auto": "Auto",
     "3.3": "3.3",
@@ -67,31 +79,61 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     local_key = data.get(LOCAL_KEY)
 
     """Validate the user input allows us to connect."""
+    # Create a MoeBot instance; connecting polls the device for its status
+    _LOGGER.debug(
+        f"Creating MoeBot instance with IP: {ip_address}, Device ID: {device_id}, Local Key: {local_key}, "
+        f"Tuya Version: {tuya_version}")
+    discovered = await async_get_discovered_devices(hass)
+    d = MoeBotDevice(device_id, ip_address, local_key, float(tuya_version) if tuya_version else None,
+                     ip_resolver=discovered.async_find_ip)
     try:
-        # Create a MoeBot instance
-        _LOGGER.debug(
-            f"Creating MoeBot instance with IP: {ip_address}, Device ID: {device_id}, Local Key: {local_key}, Tuya Version: {tuya_version}")
-        d = await hass.async_add_executor_job(
-            partial(
-                MoeBot,
-                device_id=device_id,
-                device_ip=ip_address,
-                local_key=local_key,
-                tuya_version=tuya_version
-            )
-        )
+        await d.async_connect()
     except Exception as e:
-        _LOGGER.error("Caught an exception when trying to create a MoeBot device: %s", e)
+        _LOGGER.error("Caught an exception when trying to connect to a MoeBot device: %s", e)
+        await d.async_unlisten()
         raise CannotConnect("Cannot connect to device") from e
-
-    # Poll the device to ensure it looks like a MoeBot
-    await hass.async_add_executor_job(d.poll)
+    finally:
+        discovered.release()
 
     # If we haven't been able to determine the battery level, this isn't a MoeBot device.
     if d.battery is None:
+        await d.async_unlisten()
         raise NotMoeBot("Device does not appear to be a MoeBot")
 
-    return {"title": f"MoeBot ({d.id})", "id": d.id}
+    # Hand the connection over to async_setup_entry, so that it doesn't need to connect again
+    _async_store_validated_device(hass, d)
+
+    return {"title": f"MoeBot ({d.id})", "id": d.id, SNAPSHOT: d.snapshot}
+
+
+@callback
+def _async_store_validated_device(hass: HomeAssistant, device: MoeBotDevice) -> None:
+    validated = hass.data.setdefault(VALIDATED_DEVICES, {})
+    if (previous := validated.pop(device.id, None)) is not None:
+        hass.async_create_task(previous[0].async_unlisten())
+
+    @callback
+    def _expire(now) -> None:
+        # No config entry has been set up with the connection
+        if validated.get(device.id, (None,))[0] is device:
+            validated.pop(device.id)
+            hass.async_create_task(device.async_unlisten())
+
+    validated[device.id] = (device, async_call_later(hass, VALIDATED_DEVICE_TIMEOUT, _expire))
+
+
+@callback
+def async_pop_validated_device(hass: HomeAssistant, device_id: str) -> MoeBotDevice | None:
+    """Take over the connection made when the device was validated, if it is still open."""
+    device, cancel_expiry = hass.data.get(VALIDATED_DEVICES, {}).pop(device_id, (None, None))
+    if device is None:
+        return None
+
+    cancel_expiry()
+    if not device.online:
+        hass.async_create_task(device.async_unlisten())
+        return None
+    return device
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -99,6 +141,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 2
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     def __init__(self) -> None:
         """Initialize class properties."""
         self.task_one: asyncio.Task | None = None
@@ -130,6 +178,26 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             menu_options=["cloud", "lookup_local_devices", "device_details"],
         )
 
+    async def async_step_integration_discovery(self, discovery_info: dict[str, Any]) -> FlowResult:
+        """Handle a MoeBot heard announcing itself on the local network."""
+        await self.async_set_unique_id(discovery_info["id"])
+        self._abort_if_unique_id_configured()
+
+        self.context["title_placeholders"] = {"name": f"MoeBot ({discovery_info['id']})"}
+        self._discovered_devices = [
+            {
+                "name": "Unnamed Device",
+                "id": discovery_info["id"],
+                "ip": discovery_info["ip"],
+                "version": discovery_info["version"],
+                "mac": "Unknown MAC",
+            }
+        ]
+
+        # Go straight to the details, prefilled with the discovered device, for the local key to be entered
+        self._previous_step = "device_select"
+        return await self.async_step_device_details({"selected_device": discovery_info["id"]})
+
     async def async_step_cloud(self, user_input=None) -> FlowResult:
         """Tuya Cloud Credentials Step."""
         if user_input is not None:
@@ -225,15 +293,73 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._previous_step = "lookup_cloud_devices"
         return self.async_show_progress_done(next_step_id="device_select")
 
-    async def async_step_lookup_local_devices(self, user_input=None) -> FlowResult:
-        """Background Progress Step managing the local TinyTuya network scan."""
-        import tinytuya  # Inline import helper context
+    async def _async_discover_local_devices(self) -> dict[str, dict[str, Any]]:
+        """Listen for devices announcing themselves on the local network.
+
+        Every device announces itself within DISCOVERY_TIMEOUT, so once the beacons have been listened for that long
+        in the background, the devices heard are returned as soon as any v3.5 devices have answered. Otherwise
+        devices are gathered as their beacons are heard, for DISCOVERY_TIMEOUT; or until shortly after an unconfigured
+        MoeBot is found, if it can be told apart from the other Tuya devices by the product key of a MoeBot already
+        configured.
+        """
+        configured_unique_ids = {
+            entry.unique_id
+            for entry in self._async_current_entries()
+            if entry.unique_id is not None
+        }
+        discovered = await async_get_discovered_devices(self.hass)
+        moebot_product_keys = {
+            device["product_key"]
+            for unique_id in configured_unique_ids
+            if (device := discovered.get(unique_id)) is not None and device.get("product_key")
+        }
+        found: dict[str, dict[str, Any]] = {device["id"]: device for device in discovered.devices()}
+        device_found = asyncio.Event()
+
+        @callback
+        def _device_announced(device: dict[str, Any]) -> None:
+            _LOGGER.debug("Discovered device: %s", device)
+            found[device["id"]] = device
+            device_found.set()
+
+        remove_listener = discovered.add_listener(_device_announced)
+        release_requests = discovered.async_request_active()
+
+        loop = self.hass.loop
+        started = loop.time()
+        # The time already spent listening in the background counts towards the timeout
+        deadline = started + DISCOVERY_TIMEOUT - discovered.listened_for
+        # but v3.5 devices only announce themselves when asked, which isn't done in the background
+        if discovered.can_request:
+            deadline = max(deadline, started + DISCOVERY_SETTLE_TIME)
+        try:
+            if deadline <= started:
+                _LOGGER.debug("Using the %d devices already discovered", len(found))
+                return found
+
+            while (remaining := deadline - loop.time()) > 0:
+                if any(device_id not in configured_unique_ids and device.get("product_key") in moebot_product_keys
+                       for device_id, device in found.items()):
+                    remaining = min(remaining, DISCOVERY_SETTLE_TIME)
+                device_found.clear()
+                try:
+                    async with asyncio.timeout(remaining):
+                        await device_found.wait()
+                except TimeoutError:
+                    break
+                self.async_update_progress(min(1 - (deadline - loop.time()) / DISCOVERY_TIMEOUT, 1.0))
+        finally:
+            release_requests()
+            remove_listener()
+            discovered.release()
 
-        if not self.task_one:
-            async def _scan():
-                return await self.hass.async_add_executor_job(pymoebot.scan_local_devices)
+        _LOGGER.debug("Found %d local devices in %.1f seconds", len(found), loop.time() - started)
+        return found
 
-            self.task_one = self.hass.async_create_task(_scan())
+    async def async_step_lookup_local_devices(self, user_input=None) -> FlowResult:
+        """Background Progress Step managing the local network discovery."""
+        if not self.task_one:
+            self.task_one = self.hass.async_create_task(self._async_discover_local_devices())
 
             return self.async_show_progress(
                 step_id="lookup_local_devices",
@@ -268,7 +394,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 if device["id"] not in configured_unique_ids
             ]
         except Exception as err:
-            _LOGGER.error("Failed to run local tinytuya network scan: %s", err)
+            _LOGGER.error("Failed to discover local devices: %s", err)
             self._discovered_devices = []
         finally:
             self.task_one = None
@@ -340,11 +466,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         # Are we ready to create the entry?
         if self._previous_step == "device_details" and user_input is not None:
+            # A MoeBot only accepts one connection, so don't connect to one that is already configured
+            await self.async_set_unique_id(user_input[DEVICE_ID])
+            self._abort_if_unique_id_configured()
+
             # Validate our inputs to check they are all valid
             try:
                 info = await validate_input(self.hass, user_input)
-                await self.async_set_unique_id(info["id"])
-                self._abort_if_unique_id_configured()
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except NotMoeBot:
@@ -355,7 +483,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception during configuration")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                return self.async_create_entry(title=info["title"], data={**user_input, SNAPSHOT: info[SNAPSHOT]})
 
         data_schema = vol.Schema(
             {
@@ -408,7 +536,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             else:
                 return self.async_update_reload_and_abort(
                     entry,
-                    data=schema_data
+                    data={**schema_data, SNAPSHOT: info[SNAPSHOT]}
                 )
 
         return self.async_show_form(
@@ -426,3 +554,45 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options for a MoeBot."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._config_entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_LAST_MESSAGE_THROTTLE,
+                        default=options.get(CONF_LAST_MESSAGE_THROTTLE, DEFAULT_LAST_MESSAGE_THROTTLE)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Required(
+                        CONF_LAST_MESSAGE_ATTRIBUTE,
+                        default=options.get(CONF_LAST_MESSAGE_ATTRIBUTE, DEFAULT_LAST_MESSAGE_ATTRIBUTE)
+                    ): cv.boolean,
+                    vol.Required(
+                        CONF_HEARTBEAT_INTERVAL,
+                        default=options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=60)),
+                    vol.Required(
+                        CONF_DOCKED_HEARTBEAT_INTERVAL,
+                        default=options.get(CONF_DOCKED_HEARTBEAT_INTERVAL, DEFAULT_DOCKED_HEARTBEAT_INTERVAL)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+                    vol.Required(
+                        CONF_IDLE_MODE,
+                        default=options.get(CONF_IDLE_MODE, DEFAULT_IDLE_MODE)
+                    ): cv.boolean,
+                }
+            ),
+        )
@@ -6,3 +6,31 @@ DEVICE_ID = "device_id"
 IP_ADDRESS = "ip_address"
 LOCAL_KEY = "local_key"
 TUYA_VERSION = "tuya_version"
+# What was learnt about the device when it was last connected to, including the Tuya version that worked
+SNAPSHOT = "snapshot"
+
+# The Tuya data points (DPS) reported by a MoeBot
+DPS_BATTERY = "6"
+DPS_BATTERY_ALT = "13"  # Used by the Koszacy variant
+DPS_STATE = "101"
+DPS_EMERGENCY_STATE = "103"
+DPS_MOW_IN_RAIN = "104"
+DPS_MOW_TIME = "105"
+DPS_ZONES = "113"
+DPS_WORK_MODE = "114"
+
+# Services
+SERVICE_SET_ZONES = "set_zones"
+
+# Options
+CONF_LAST_MESSAGE_ATTRIBUTE = "last_message_attribute"
+CONF_LAST_MESSAGE_THROTTLE = "last_message_throttle"
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+CONF_DOCKED_HEARTBEAT_INTERVAL = "docked_heartbeat_interval"
+CONF_IDLE_MODE = "idle_mode"
+
+DEFAULT_LAST_MESSAGE_ATTRIBUTE = False
+DEFAULT_LAST_MESSAGE_THROTTLE = 60  # seconds
+DEFAULT_HEARTBEAT_INTERVAL = 12  # seconds
+DEFAULT_DOCKED_HEARTBEAT_INTERVAL = 20  # seconds
+DEFAULT_IDLE_MODE = False
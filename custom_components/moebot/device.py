@@ -0,0 +1,605 @@
+"""A MoeBot connected over the local network with asyncio."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any
+
+import pymoebot
+import tinytuya
+from pymoebot import MoeBotConnectionError, MoeBotStateException, ZoneConfig
+
+from .commands import CommandQueue
+from .const import DPS_BATTERY, DPS_BATTERY_ALT, DPS_EMERGENCY_STATE, DPS_MOW_IN_RAIN, DPS_MOW_TIME, DPS_STATE, \
+    DPS_WORK_MODE, DPS_ZONES, IP_ADDRESS, TUYA_VERSION
+from .tuya import TUYA_PORT, TuyaProtocol
+
+_log = logging.getLogger(__package__)
+
+# The Tuya protocol versions to try, in order, when the version isn't known
+TUYA_VERSIONS = (3.5, 3.4, 3.3)
+
+CONNECT_TIMEOUT = 5  # seconds
+HEARTBEAT_INTERVAL = 12  # seconds
+# The states in which the MoeBot is sitting in its dock, or otherwise not working
+DOCKED_STATES = ("STANDBY", "CHARGING", "CHARGING_WITH_TASK_SUSPEND")
+# In idle mode, the heartbeat slows to this once the MoeBot has been docked, without a command or a message pushed
+# by the MoeBot, for IDLE_AFTER
+IDLE_AFTER = 600  # seconds
+IDLE_HEARTBEAT_INTERVAL = 60  # seconds
+# The MoeBot is polled for its status when it hasn't sent any data points for a while, how long depends on what it
+# is doing; while it is working its state and battery change quickly, while it is charging they change slowly
+STATUS_INTERVAL = 300  # seconds
+STATUS_INTERVALS = {
+    "MOWING": 30,
+    "FIXED_MOWING": 30,
+    "PARK": 30,
+    "CHARGING": 900,
+    "CHARGING_WITH_TASK_SUSPEND": 900,
+}
+STATE_CHANGE_TIMEOUT = 10  # seconds
+# After this many failed attempts to reconnect, check whether the MoeBot has a new IP address
+RESOLVE_AFTER_FAILURES = 3
+# The wait before reconnecting doubles with each failed attempt, from the first delay up to the maximum
+RECONNECT_DELAY = 5  # seconds
+RECONNECT_MAX_DELAY = 300  # seconds
+
+DPS_COMMAND = "115"
+DPS_REFRESH = "109"
+
+
+class MoeBotDevice:
+    """A MoeBot, driven from the event loop.
+
+    Provides the same properties as pymoebot's MoeBot, but the connection to the device is an asyncio protocol
+    running on the event loop, rather than a background thread, and the commands are coroutines.
+
+    The listeners are called, on the event loop, with every message received from the device that carries data
+    points. They are also called with an empty message when the connection to the device is lost.
+    """
+
+    def __init__(self, device_id: str, device_ip: str, local_key: str, tuya_version: float | None = None,
+                 preferred_tuya_version: float | None = None,
+                 ip_resolver: Callable[[str], Awaitable[str | None]] | None = None) -> None:
+        self.__id: str = device_id
+        self.__ip: str = device_ip
+        self.__key: str = local_key
+        self.__tuya_version: float | None = tuya_version
+        # The version to try first when the version isn't known, usually the one that worked last time
+        self.__preferred_tuya_version: float | None = preferred_tuya_version
+        # Finds the IP address of the device from its id, when it is 'Auto'
+        self.__ip_resolver = ip_resolver
+
+        self.__listeners: list[Callable[[dict[str, Any]], None]] = []
+        self.__address_listeners: list[Callable[[str], None]] = []
+        self.__state_waiters: dict[str, list[asyncio.Future]] = {}
+
+        self.__battery: int | None = None
+        self.__state: str | None = None
+        self.__emergency_state: str | None = None
+        self.__mow_in_rain: bool | None = None
+        self.__mow_time: int | None = None
+        self.__work_mode: str | None = None
+        self.__zones: ZoneConfig | None = None
+        self.__zones_raw: str | None = None
+        self.__zone_values: tuple[int, ...] | None = None
+        self.__last_update: int | None = None
+        # The (event loop) time data points were last received
+        self.__last_received: float = 0
+        # The (event loop) time of the last command or change of state
+        self.__last_activity: float = 0
+        self.__heartbeat_interval: float = HEARTBEAT_INTERVAL
+        self.__docked_heartbeat_interval: float = HEARTBEAT_INTERVAL
+        self.__idle_mode: bool = False
+        self.__online: bool = False
+        # Whether the data points were restored from a snapshot, and the MoeBot hasn't been found to be unreachable
+        self.__restored: bool = False
+        # The latest value of every data point the MoeBot has reported
+        self.__dps: dict[str, Any] = {}
+
+        self.__protocol: TuyaProtocol | None = None
+        self.__keepalive: asyncio.Task | None = None
+        self.__commands = CommandQueue(self.__write)
+        self.__poll: asyncio.Task | None = None
+        self.__reconnect_now = asyncio.Event()
+        # Where the MoeBot was last heard on the network, while waiting to reconnect
+        self.__heard_ip: str | None = None
+        # Whether being heard at its address has already cut short a wait to reconnect, since the MoeBot was lost
+        self.__reconnected_early: bool = False
+        # Set when an idle MoeBot closes the connection, which is reconnected to before anyone is told
+        self.__dropped_while_idle = asyncio.Event()
+
+    async def async_connect(self) -> None:
+        """Connect to the MoeBot and fetch its status, working out the Tuya protocol version if it isn't known."""
+        if self.__ip in (None, "", "Auto"):
+            await self.__async_resolve_ip()
+
+        try:
+            await self.__async_connect_any_version()
+        except MoeBotConnectionError:
+            # The MoeBot may have been given a new IP address since it was last connected to
+            if not await self.__async_reresolve_ip():
+                raise
+            await self.__async_connect_any_version()
+
+    def restore(self, snapshot: Mapping[str, Any]) -> None:
+        """Start from what was known about the MoeBot when it was last connected to, until it reports its status."""
+        self.__apply_dps(snapshot.get("dps") or {})
+        self.__last_update = snapshot.get("last_update")
+        self.__restored = bool(snapshot.get("dps"))
+
+    async def __async_connect_any_version(self) -> None:
+        if self.__tuya_version:
+            versions = (self.__tuya_version,)
+        elif self.__preferred_tuya_version in TUYA_VERSIONS:
+            versions = (self.__preferred_tuya_version,) + tuple(v for v in TUYA_VERSIONS
+                                                                if v != self.__preferred_tuya_version)
+        else:
+            versions = TUYA_VERSIONS
+        for version in versions:
+            try:
+                await self.__async_open(version)
+                await self.async_poll()
+            except (OSError, TimeoutError, MoeBotConnectionError) as err:
+                _log.debug("Unable to connect to %s with Tuya version %r: %r", self.__id, version, err)
+                self.__close()
+                continue
+
+            self.__tuya_version = version
+            return
+
+        raise MoeBotConnectionError(f"Unable to connect to MoeBot {self.__id} at {self.__ip}")
+
+    def listen(self) -> None:
+        """Keep the connection to the MoeBot alive, reconnecting if it is lost.
+
+        If the MoeBot isn't connected yet, the first connection is made straight away, in the background.
+        """
+        if self.__keepalive is None:
+            self.__last_activity = asyncio.get_running_loop().time()
+            self.__keepalive = asyncio.get_running_loop().create_task(self.__async_keepalive(),
+                                                                      name=f"moebot {self.__id} keepalive")
+        else:
+            _log.error("Already listening")
+
+    async def async_unlisten(self) -> None:
+        """Stop keeping the connection alive and disconnect from the MoeBot."""
+        _log.debug("Unlistening to MoeBot")
+        if self.__keepalive is not None:
+            self.__keepalive.cancel()
+            try:
+                await self.__keepalive
+            except asyncio.CancelledError:
+                pass
+            self.__keepalive = None
+        self.__commands.clear()
+        self.__close()
+        # The connection may already have been closed by an idle MoeBot
+        self.__dropped_while_idle.clear()
+        self.__set_offline()
+
+    @property
+    def is_listening(self) -> bool:
+        return self.__keepalive is not None
+
+    def configure_heartbeat(self, heartbeat_interval: float, docked_heartbeat_interval: float,
+                            idle_mode: bool = False) -> None:
+        """Set how often the connection is kept alive while the MoeBot is working, and while it is docked.
+
+        In idle mode, the heartbeat slows further once the MoeBot has been docked and quiet for a while; it goes back
+        to the docked rate as soon as a command is sent or the MoeBot pushes a message, such as a change of state.
+        """
+        self.__heartbeat_interval = heartbeat_interval
+        self.__docked_heartbeat_interval = docked_heartbeat_interval
+        self.__idle_mode = idle_mode
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> Callable[[], None]:
+        """Call listener with every message from the MoeBot; returns a function to remove it."""
+        self.__listeners.append(listener)
+        return lambda: self.__listeners.remove(listener)
+
+    def reconnect_now(self, ip: str | None = None) -> None:
+        """Cut short the wait to reconnect, such as when the MoeBot has been heard on the network at ip.
+
+        A MoeBot that keeps announcing itself but refuses connections would otherwise be retried with every beacon;
+        so being heard at the address already tried only cuts short one wait, until the MoeBot is connected to again.
+        Being heard at a new address always does.
+        """
+        if self.__protocol is None and (not self.__reconnected_early or (ip and ip != self.__ip)):
+            self.__heard_ip = ip
+            self.__reconnect_now.set()
+
+    def add_address_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Call listener with the new IP address whenever the MoeBot is found at a different one; returns a function to
+        remove it."""
+        self.__address_listeners.append(listener)
+        return lambda: self.__address_listeners.remove(listener)
+
+    async def __async_resolve_ip(self) -> None:
+        ip = await self.__ip_resolver(self.__id) if self.__ip_resolver is not None else None
+        if not ip:
+            raise MoeBotConnectionError(f"Unable to find MoeBot {self.__id} on the local network")
+        self.__ip = ip
+        _log.info("Found MoeBot %s at %s", self.__id, self.__ip)
+
+    async def __async_reresolve_ip(self) -> bool:
+        """Look for the MoeBot on the local network, returning whether it is at a different IP address."""
+        if self.__ip_resolver is None:
+            return False
+        return self.__move_to(await self.__ip_resolver(self.__id))
+
+    def __move_to(self, ip: str | None) -> bool:
+        """Use the IP address the MoeBot was found at, returning whether it is a different address."""
+        if not ip or ip == self.__ip:
+            return False
+
+        _log.info("MoeBot %s has moved from %s to %s", self.__id, self.__ip, ip)
+        self.__ip = ip
+        for listener in self.__address_listeners:
+            listener(ip)
+        return True
+
+    async def __async_open(self, version: float) -> None:
+        self.__close()
+        loop = asyncio.get_running_loop()
+        async with asyncio.timeout(CONNECT_TIMEOUT):
+            _, protocol = await loop.create_connection(
+                lambda: TuyaProtocol(self.__id, self.__key, version, self.__message_received,
+                                     self.__connection_lost),
+                self.__ip, TUYA_PORT)
+        self.__protocol = protocol
+        if version >= 3.4:
+            await protocol.async_negotiate_session_key()
+
+    def __close(self) -> None:
+        if self.__protocol is not None:
+            protocol, self.__protocol = self.__protocol, None
+            protocol.close()
+            self.__set_offline()
+
+    def __connection_lost(self, protocol: TuyaProtocol, exc: Exception | None) -> None:
+        # Only the current connection matters, not those closed while working out the version
+        if protocol is self.__protocol:
+            self.__protocol = None
+            if self.__idle:
+                # The heartbeat is slow enough for the MoeBot to close the connection as quiet, which is expected
+                _log.debug("%s closed the connection while idle, reconnecting", self.__id)
+                self.__dropped_while_idle.set()
+            else:
+                self.__set_offline()
+
+    def __set_offline(self) -> None:
+        if self.__online:
+            self.__online = False
+            for listener in self.__listeners:
+                listener({})
+
+    async def __async_wait_to_reconnect(self, failures: int) -> bool:
+        """Wait before reconnecting, returning True if the wait was cut short."""
+        # Back off exponentially, with jitter so that MoeBots that went offline together don't all reconnect together
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_DELAY * 2 ** min(failures, 10))
+        delay = random.uniform(delay / 2, delay)
+        _log.debug("Reconnecting to %s in %.1f seconds", self.__id, delay)
+
+        try:
+            async with asyncio.timeout(delay):
+                await self.__reconnect_now.wait()
+        except TimeoutError:
+            return False
+        _log.debug("Reconnecting to %s early", self.__id)
+        return True
+
+    async def __async_keepalive(self) -> None:
+        loop = asyncio.get_running_loop()
+        failures = 0
+        # Only wait before reconnecting, not before connecting for the first time
+        reconnecting = self.__protocol is not None
+        while True:
+            if self.__protocol is None:
+                if reconnecting and not self.__dropped_while_idle.is_set():
+                    if await self.__async_wait_to_reconnect(failures):
+                        # Having been heard on the network, the MoeBot's address is already known
+                        if not self.__move_to(self.__heard_ip):
+                            self.__reconnected_early = True
+                    elif failures and failures % RESOLVE_AFTER_FAILURES == 0:
+                        await self.__async_reresolve_ip()
+                reconnecting = True
+                # Only the MoeBot being heard while waiting for the next attempt cuts that wait short
+                self.__reconnect_now.clear()
+                try:
+                    _log.debug("Connecting to %s", self.__id)
+                    if self.__ip in (None, "", "Auto"):
+                        await self.__async_resolve_ip()
+                    await self.__async_connect_any_version()
+                except (OSError, TimeoutError, MoeBotConnectionError) as err:
+                    failures += 1
+                    _log.debug("Unable to connect to %s (attempt %d): %r", self.__id, failures, err)
+                    self.__close()
+                    if self.__dropped_while_idle.is_set():
+                        # Not being able to reconnect straight away is no longer expected
+                        self.__dropped_while_idle.clear()
+                        self.__set_offline()
+                    if self.__restored:
+                        # What was restored can no longer be relied on
+                        self.__restored = False
+                        for listener in self.__listeners:
+                            listener({})
+                    continue
+                failures = 0
+                self.__reconnected_early = False
+                self.__dropped_while_idle.clear()
+
+            # Reconnect straight away when an idle MoeBot closes the connection, rather than at the next heartbeat
+            try:
+                async with asyncio.timeout(self.__current_heartbeat_interval):
+                    await self.__dropped_while_idle.wait()
+            except TimeoutError:
+                pass
+            if self.__protocol is None:
+                continue
+            try:
+                if self.__poll is None and loop.time() - self.__last_received >= self.__status_interval:
+                    _log.debug("Nothing heard from %s for a while, polling for status", self.__id)
+                    await self.async_poll()
+                else:
+                    _log.debug("Sending a heartbeat")
+                    await self.__protocol.async_request(tinytuya.HEART_BEAT)
+            except (OSError, TimeoutError, MoeBotConnectionError) as err:
+                _log.debug("Lost contact with %s: %r", self.__id, err)
+                self.__close()
+
+    def __message_received(self, data: dict[str, Any], pushed: bool) -> None:
+        _log.debug("Parsing data from device: %r" % data)
+        self.__online = True
+        self.__restored = False
+        self.__last_received = asyncio.get_running_loop().time()
+
+        dps = data["dps"]
+        # Replies to polls don't count, the MoeBot hasn't done anything to send them
+        if pushed or dps.get(DPS_STATE, self.__state) != self.__state:
+            self.__last_activity = self.__last_received
+        self.__apply_dps(dps)
+
+        if "t" in data:
+            self.__last_update = data["t"]
+
+        for waiter in self.__state_waiters.pop(self.__state, []):
+            if not waiter.done():
+                waiter.set_result(None)
+
+        for listener in self.__listeners:
+            listener(data)
+
+    def __apply_dps(self, dps: Mapping[str, Any]) -> None:
+        self.__dps.update(dps)
+        if DPS_BATTERY in dps:
+            self.__battery = dps[DPS_BATTERY]
+        if DPS_BATTERY_ALT in dps:
+            self.__battery = dps[DPS_BATTERY_ALT]
+        if DPS_STATE in dps:
+            self.__state = dps[DPS_STATE]
+        if DPS_EMERGENCY_STATE in dps:
+            self.__emergency_state = dps[DPS_EMERGENCY_STATE]
+        if DPS_MOW_IN_RAIN in dps:
+            self.__mow_in_rain = dps[DPS_MOW_IN_RAIN]
+        if DPS_MOW_TIME in dps:
+            self.__mow_time = dps[DPS_MOW_TIME]
+        if DPS_ZONES in dps and dps[DPS_ZONES] != self.__zones_raw:
+            # The zones are reported with every status, they are only decoded when they change
+            self.__zones_raw = dps[DPS_ZONES]
+            self.__zones = ZoneConfig.decode(self.__zones_raw)
+            zc = self.__zones
+            self.__zone_values = tuple(int(v) for zone in (zc.zone1, zc.zone2, zc.zone3, zc.zone4, zc.zone5)
+                                       for v in zone)
+        if DPS_WORK_MODE in dps:
+            self.__work_mode = dps[DPS_WORK_MODE]
+
+    @property
+    def __idle(self) -> bool:
+        """Return whether idle mode has slowed the heartbeat."""
+        return (self.__idle_mode and self.__state in DOCKED_STATES
+                and asyncio.get_running_loop().time() - self.__last_activity >= IDLE_AFTER)
+
+    @property
+    def __current_heartbeat_interval(self) -> float:
+        if self.__state not in DOCKED_STATES:
+            return self.__heartbeat_interval
+        if self.__idle:
+            return max(self.__docked_heartbeat_interval, IDLE_HEARTBEAT_INTERVAL)
+        return self.__docked_heartbeat_interval
+
+    @property
+    def __status_interval(self) -> float:
+        return STATUS_INTERVALS.get(self.__state, STATUS_INTERVAL)
+
+    def __connected_protocol(self) -> TuyaProtocol:
+        if self.__protocol is None:
+            raise MoeBotConnectionError(f"MoeBot {self.__id} is not connected")
+        return self.__protocol
+
+    def __write(self, dps: dict[str, Any]) -> None:
+        self.__connected_protocol().send(tinytuya.CONTROL, dps)
+
+    async def __async_send_command(self, dps: str, arg: Any) -> None:
+        if dps != DPS_REFRESH:
+            self.__last_activity = asyncio.get_running_loop().time()
+        await self.__commands.async_put(dps, arg)
+
+    async def __async_wait_for_state(self, target_state: str, timeout: float = STATE_CHANGE_TIMEOUT) -> None:
+        if self.__state != target_state:
+            _log.debug("Waiting for a change to '%s'", target_state)
+            waiter = asyncio.get_running_loop().create_future()
+            self.__state_waiters.setdefault(target_state, []).append(waiter)
+            try:
+                async with asyncio.timeout(timeout):
+                    await waiter
+            except TimeoutError:
+                pass
+            finally:
+                if waiter in self.__state_waiters.get(target_state, []):
+                    self.__state_waiters[target_state].remove(waiter)
+        _log.info("After waiting, the state is '%s'", self.__state)
+
+    @property
+    def id(self) -> str:
+        return self.__id
+
+    @property
+    def ip_address(self) -> str:
+        return self.__ip
+
+    @property
+    def online(self) -> bool:
+        return self.__protocol is not None and self.__online
+
+    @property
+    def available(self) -> bool:
+        """Return whether the MoeBot's data points can be relied on; it is online, or the first attempt to connect to
+        it since they were restored hasn't failed yet."""
+        return self.online or self.__restored
+
+    @property
+    def tuya_version(self) -> float | None:
+        # While the version is being worked out, the version of the connection that is open is the one that works
+        if self.__protocol is not None:
+            return self.__protocol.version
+        return self.__tuya_version
+
+    @property
+    def pymoebot_version(self) -> str:
+        return pymoebot.__version__
+
+    @property
+    def last_update(self) -> int | None:
+        return self.__last_update
+
+    @property
+    def command_queue_depth(self) -> int:
+        return self.__commands.depth
+
+    @property
+    def command_latency(self) -> float | None:
+        """Return how long, in seconds, the last command waited to be sent."""
+        return self.__commands.latency
+
+    @property
+    def snapshot(self) -> dict[str, Any]:
+        """Return what is known about the MoeBot, in a form that can be stored."""
+        return {
+            IP_ADDRESS: self.__ip,
+            TUYA_VERSION: self.tuya_version,
+            "last_update": self.__last_update,
+            "dps": dict(self.__dps),
+        }
+
+    @property
+    def mow_time(self) -> int | None:
+        return self.__mow_time
+
+    async def async_set_mow_time(self, mow_time: int) -> None:
+        await self.__async_send_command(DPS_MOW_TIME, mow_time)
+
+    @property
+    def mow_in_rain(self) -> bool | None:
+        return self.__mow_in_rain
+
+    async def async_set_mow_in_rain(self, mow_in_rain: bool) -> None:
+        await self.__async_send_command(DPS_MOW_IN_RAIN, mow_in_rain)
+
+    @property
+    def zones(self) -> ZoneConfig | None:
+        return self.__zones
+
+    @property
+    def zone_values(self) -> tuple[int, ...] | None:
+        """Return the distance and ratio of each zone in turn, as integers."""
+        return self.__zone_values
+
+    async def async_set_zones(self, zone_config: ZoneConfig) -> None:
+        await self.__async_send_command(DPS_ZONES, zone_config.encode())
+
+    @property
+    def battery(self) -> int | None:
+        return self.__battery
+
+    @property
+    def state(self) -> str | None:
+        return self.__state
+
+    @property
+    def emergency_state(self) -> str | None:
+        return self.__emergency_state
+
+    @property
+    def work_mode(self) -> str | None:
+        return self.__work_mode
+
+    async def async_poll(self) -> None:
+        """Ask the MoeBot for its status, or wait for the answer if it has already been asked."""
+        if self.__poll is None:
+            self.__poll = asyncio.get_running_loop().create_task(self.__async_poll(), name=f"moebot {self.__id} poll")
+            self.__poll.add_done_callback(self.__poll_done)
+        else:
+            _log.debug("Already polling %s", self.__id)
+        await asyncio.shield(self.__poll)
+
+    async def __async_poll(self) -> None:
+        result = await self.__connected_protocol().async_request(tinytuya.DP_QUERY)
+        if not result or "dps" not in result:
+            raise MoeBotConnectionError(f"Invalid status from MoeBot {self.__id}: {result!r}")
+        await self.__async_send_command(DPS_REFRESH, "")
+
+    def __poll_done(self, task: asyncio.Task) -> None:
+        self.__poll = None
+        # Retrieve the exception; it has been raised to those waiting for the poll, if any still are
+        if not task.cancelled():
+            task.exception()
+
+    async def async_start(self, spiral: bool = False) -> None:
+        _log.debug("Attempting to start mowing: %r", self.__state)
+        if self.__state in ("STANDBY", "PAUSED", "CHARGING"):
+            if self.__state == "PAUSED":
+                _log.debug("ContinueWork")
+                await self.__async_send_command(DPS_COMMAND, "ContinueWork")
+            elif not spiral:
+                _log.debug("StartMowing")
+                await self.__async_send_command(DPS_COMMAND, "StartMowing")
+            else:
+                _log.debug("StartFixedMowing")
+                await self.__async_send_command(DPS_COMMAND, "StartFixedMowing")
+            await self.__async_wait_for_state("MOWING")
+        else:
+            _log.error("Unable to start due to current state: %r", self.__state)
+            raise MoeBotStateException()
+
+    async def async_pause(self) -> None:
+        _log.debug("Attempting to pause mowing: %r", self.__state)
+        if self.__state in ("MOWING", "FIXED_MOWING"):
+            await self.__async_send_command(DPS_COMMAND, "PauseWork")
+            await self.__async_wait_for_state("PAUSED")
+        else:
+            _log.error("Unable to pause due to current state: %r", self.__state)
+            raise MoeBotStateException()
+
+    async def async_cancel(self) -> None:
+        _log.debug("Attempting to cancel mowing: %r", self.__state)
+        if self.__state in ("PAUSED", "CHARGING_WITH_TASK_SUSPEND", "PARK"):
+            await self.__async_send_command(DPS_COMMAND, "CancelWork")
+            await self.__async_wait_for_state("STANDBY")
+        else:
+            _log.error("Unable to cancel due to current state: %r", self.__state)
+            raise MoeBotStateException()
+
+    async def async_dock(self) -> None:
+        _log.debug("Attempting to dock mower: %r", self.__state)
+        if self.__state == "STANDBY":
+            await self.__async_send_command(DPS_COMMAND, "StartReturnStation")
+            await self.__async_wait_for_state("PARK")
+        else:
+            _log.error("Unable to dock due to current state: %r", self.__state)
+            raise MoeBotStateException()
+
+    def __repr__(self) -> str:
+        return "[MoeBot - {id: %s, state: %s, battery: %s}]" % (self.id, self.__state, self.__battery)
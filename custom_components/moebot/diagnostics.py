@@ -0,0 +1,42 @@
+"""Diagnostics support for the MoeBot integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import MoeBotData
+from .const import DOMAIN, LOCAL_KEY
+
+TO_REDACT = {LOCAL_KEY}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data: MoeBotData = hass.data[DOMAIN][entry.entry_id]
+    moebot = data.moebot
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "moebot": {
+            "online": moebot.online,
+            "tuya_version": moebot.tuya_version,
+            "pymoebot_version": moebot.pymoebot_version,
+            "last_update": moebot.last_update,
+            "state": moebot.state,
+            "emergency_state": moebot.emergency_state,
+            "work_mode": moebot.work_mode,
+            "battery": moebot.battery,
+            "mow_in_rain": moebot.mow_in_rain,
+            "mow_time": moebot.mow_time,
+            "command_queue_depth": moebot.command_queue_depth,
+            "command_latency": moebot.command_latency,
+        },
+        "state_machine": {
+            "state": data.state_machine.state,
+            # Rendering the graph imports graphviz, which is kept out of the normal start up of the integration.
+            "graph": await hass.async_add_executor_job(data.state_machine.get_graph_source),
+        },
+    }
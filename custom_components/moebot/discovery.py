@@ -0,0 +1,275 @@
+"""Discovers Tuya devices, such as the MoeBot, from the beacons they broadcast on the local network.
+
+Tuya devices announce themselves every few seconds with a UDP broadcast; unencrypted on port 6666 (v3.1), encrypted
+on port 6667 (v3.3 and v3.4) and, when asked by a broadcast to port 7000, on port 7000 (v3.5). tinytuya knows how to
+decrypt the beacons; this module listens for them on the event loop, rather than scanning from a blocking thread.
+
+While any MoeBot is loaded, or a config flow is looking for devices, the beacons are listened for in the background
+and the devices heard are cached, so that finding a device is usually instant. v3.5 devices are only asked to
+announce themselves while a device is being looked for.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+import tinytuya
+from homeassistant.components import network
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+_log = logging.getLogger(__package__)
+
+DISCOVERY_PORTS = (tinytuya.UDPPORT, tinytuya.UDPPORTS, tinytuya.UDPPORTAPP)
+
+# How often to ask v3.5 devices to announce themselves
+DISCOVERY_REQUEST_INTERVAL = 6  # seconds
+# The longest to wait for a device to announce itself; they do so every few seconds
+DISCOVERY_TIMEOUT = 18  # seconds
+# How long a device is remembered after its last beacon
+DISCOVERY_TTL = 300  # seconds
+
+DATA_DISCOVERY = f"{DOMAIN}_discovery"
+
+
+def _parse_beacon(data: bytes, addr: tuple[str, int]) -> dict[str, Any] | None:
+    """Decrypt a beacon, returning the device it announces."""
+    try:
+        beacon = json.loads(tinytuya.decrypt_udp(data))
+    except Exception:
+        _log.debug("Ignoring an undecodable beacon from %s", addr[0])
+        return None
+
+    # Discovery requests (our own included) are also broadcast to port 7000, they don't carry a device id
+    if not isinstance(beacon, dict) or not beacon.get("gwId"):
+        return None
+
+    return {
+        "id": beacon["gwId"],
+        "ip": beacon.get("ip") or addr[0],
+        "version": str(beacon.get("version", "")),
+        "product_key": beacon.get("productKey"),
+    }
+
+
+class _BeaconProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_device: Callable[[dict[str, Any]], None]) -> None:
+        self._on_device = on_device
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        if (device := _parse_beacon(data, addr)) is not None:
+            self._on_device(device)
+
+    def error_received(self, exc: Exception) -> None:
+        _log.debug("Error on a discovery socket: %r", exc)
+
+
+class TuyaDiscovery:
+    """Listens for Tuya beacons, passing each device announced to on_device as it is heard.
+
+    Other integrations may be listening for the same beacons, so the ports are shared with them. A port that can't be
+    listened on is skipped; the devices that announce themselves on the other ports will still be found.
+    """
+
+    def __init__(self, on_device: Callable[[dict[str, Any]], None], source_ip: str | None = None) -> None:
+        self._on_device = on_device
+        self._source_ip = source_ip
+        self._transports: dict[int, asyncio.DatagramTransport] = {}
+        self._requester: asyncio.TimerHandle | None = None
+
+    async def async_start(self) -> None:
+        try:
+            await self._async_listen()
+        except BaseException:
+            # Don't keep the ports bound when discovery can't be started
+            self.close()
+            raise
+
+    async def _async_listen(self) -> None:
+        loop = asyncio.get_running_loop()
+        for port in DISCOVERY_PORTS:
+            try:
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _BeaconProtocol(self._on_device), local_addr=("0.0.0.0", port),
+                    reuse_port=True, allow_broadcast=True)
+            except OSError as err:
+                _log.warning("Unable to listen for Tuya beacons on port %d: %s", port, err)
+                continue
+            self._transports[port] = transport
+
+    @property
+    def can_request(self) -> bool:
+        """Return whether v3.5 devices can be asked to announce themselves."""
+        # Asking needs AES-GCM, which not every crypto library tinytuya uses has
+        return tinytuya.UDPPORTAPP in self._transports and bool(getattr(tinytuya.AESCipher, "CRYPTOLIB_HAS_GCM", False))
+
+    def start_requests(self) -> None:
+        """Ask v3.5 devices to announce themselves, every DISCOVERY_REQUEST_INTERVAL until stop_requests."""
+        if self._requester is None and self.can_request:
+            self._send_discovery_request()
+
+    def stop_requests(self) -> None:
+        if self._requester is not None:
+            self._requester.cancel()
+            self._requester = None
+
+    def close(self) -> None:
+        self.stop_requests()
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+
+    def _send_discovery_request(self) -> None:
+        # v3.5 devices only announce themselves when asked
+        request = json.dumps({"from": "app", "ip": self._source_ip or ""}).encode()
+        msg = tinytuya.TuyaMessage(0, tinytuya.REQ_DEVINFO, None, request, 0, True, tinytuya.PREFIX_6699_VALUE, True)
+        try:
+            self._transports[tinytuya.UDPPORTAPP].sendto(tinytuya.pack_message(msg, hmac_key=tinytuya.udpkey),
+                                                         ("255.255.255.255", tinytuya.UDPPORTAPP))
+        except OSError as err:
+            _log.debug("Unable to send a discovery request: %r", err)
+
+        self._requester = asyncio.get_running_loop().call_later(DISCOVERY_REQUEST_INTERVAL,
+                                                                self._send_discovery_request)
+
+
+class DiscoveredDevices:
+    """The devices recently heard announcing themselves, shared by everything that needs to find a device.
+
+    Listening starts when the first user acquires it and stops when the last user releases it. A device is forgotten
+    DISCOVERY_TTL after its last beacon.
+    """
+
+    def __init__(self, source_ip: str | None = None) -> None:
+        self._discovery = TuyaDiscovery(self._device_announced, source_ip)
+        self._users = 0
+        self._listening_since: float | None = None
+        # The number of lookups that want v3.5 devices asked to announce themselves
+        self._active_requests = 0
+        # The devices heard, keyed on their id, with the (monotonic) time of their last beacon
+        self._devices: dict[str, tuple[dict[str, Any], float]] = {}
+        self._waiters: dict[str, list[asyncio.Future]] = {}
+        self._listeners: list[Callable[[dict[str, Any]], None]] = []
+        self._beacon_listeners: dict[str, list[Callable[[dict[str, Any]], None]]] = {}
+
+    @property
+    def listening(self) -> bool:
+        return self._users > 0
+
+    @property
+    def can_request(self) -> bool:
+        return self._discovery.can_request
+
+    @property
+    def listened_for(self) -> float:
+        """Return how many seconds the beacons have been listened for, without a break."""
+        if self._listening_since is None:
+            return 0
+        return time.monotonic() - self._listening_since
+
+    async def async_acquire(self) -> None:
+        self._users += 1
+        if self._users == 1:
+            try:
+                await self._discovery.async_start()
+            except BaseException:
+                self._users -= 1
+                raise
+            self._listening_since = time.monotonic()
+
+    def release(self) -> None:
+        self._users -= 1
+        if self._users == 0:
+            self._discovery.close()
+            self._listening_since = None
+
+    def async_request_active(self) -> Callable[[], None]:
+        """Ask devices that only announce themselves when asked to do so, until the returned function is called.
+
+        Only a lookup should do this; the MoeBots that are loaded just listen, rather than broadcasting requests for
+        as long as they are loaded.
+        """
+        self._active_requests += 1
+        if self._active_requests == 1:
+            self._discovery.start_requests()
+
+        def _release() -> None:
+            self._active_requests -= 1
+            if self._active_requests == 0:
+                self._discovery.stop_requests()
+
+        return _release
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> Callable[[], None]:
+        """Call listener with each device heard that isn't already known; returns a function to remove it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def add_beacon_listener(self, device_id: str,
+                            listener: Callable[[dict[str, Any]], None]) -> Callable[[], None]:
+        """Call listener with the device announced by every beacon heard from it; returns a function to remove it."""
+        self._beacon_listeners.setdefault(device_id, []).append(listener)
+        return lambda: self._beacon_listeners[device_id].remove(listener)
+
+    def get(self, device_id: str) -> dict[str, Any] | None:
+        if (entry := self._devices.get(device_id)) is None:
+            return None
+        device, heard = entry
+        if time.monotonic() - heard > DISCOVERY_TTL:
+            del self._devices[device_id]
+            return None
+        return device
+
+    def devices(self) -> list[dict[str, Any]]:
+        return [device for device_id in list(self._devices) if (device := self.get(device_id)) is not None]
+
+    async def async_find(self, device_id: str, timeout: float = DISCOVERY_TIMEOUT) -> dict[str, Any] | None:
+        """Return the device, waiting for its next beacon if it hasn't been heard recently."""
+        if (device := self.get(device_id)) is not None or not self.listening:
+            return device
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(device_id, []).append(waiter)
+        # The device may be one that only announces itself when asked
+        release_requests = self.async_request_active()
+        try:
+            async with asyncio.timeout(timeout):
+                return await waiter
+        except TimeoutError:
+            return None
+        finally:
+            release_requests()
+            if waiter in self._waiters.get(device_id, []):
+                self._waiters[device_id].remove(waiter)
+
+    async def async_find_ip(self, device_id: str) -> str | None:
+        device = await self.async_find(device_id)
+        return device["ip"] if device else None
+
+    def _device_announced(self, device: dict[str, Any]) -> None:
+        known = self.get(device["id"])
+        self._devices[device["id"]] = (device, time.monotonic())
+
+        for waiter in self._waiters.pop(device["id"], []):
+            if not waiter.done():
+                waiter.set_result(device)
+        for listener in list(self._beacon_listeners.get(device["id"], [])):
+            listener(device)
+
+        if known is None or known["ip"] != device["ip"]:
+            _log.debug("Heard from device: %s", device)
+            for listener in list(self._listeners):
+                listener(device)
+
+
+async def async_get_discovered_devices(hass: HomeAssistant) -> DiscoveredDevices:
+    """Return the devices discovered on the local network, listening until the caller releases them."""
+    if (discovered := hass.data.get(DATA_DISCOVERY)) is None:
+        discovered = hass.data[DATA_DISCOVERY] = DiscoveredDevices(await network.async_get_source_ip(hass))
+    await discovered.async_acquire()
+    return discovered
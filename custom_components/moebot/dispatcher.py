@@ -0,0 +1,90 @@
+"""Per-device update dispatcher for the MoeBot integration."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+from .device import MoeBotDevice
+
+_log = logging.getLogger(__package__)
+
+UpdateListener = Callable[[dict[str, Any]], None]
+
+
+class MoeBotDispatcher:
+    """Receives every message from a MoeBot once and fans it out to the interested listeners.
+
+    Rather than every entity registering its own listener on the MoeBot, the dispatcher is the only listener. It
+    receives each message once, on the event loop, and then updates all the interested listeners in the same loop
+    iteration.
+
+    Listeners register for the Tuya data points (DPS) they depend on and are only called when a message carries
+    one of them. A listener registered without any DPS is called for every message. Every listener is called
+    when the MoeBot becomes available or unavailable, as that changes the availability of all the entities, and
+    when it is connected to with a different Tuya version; once the version has been worked out, or after a restart,
+    the MoeBot may stay available throughout.
+    Listeners are called in the order they registered.
+    """
+
+    def __init__(self, moebot: MoeBotDevice) -> None:
+        self.moebot = moebot
+        self._listeners: list[UpdateListener] = []
+        self._every_message_listeners: list[UpdateListener] = []
+        self._dps_listeners: dict[str, list[UpdateListener]] = {}
+        # The MoeBot's availability and Tuya version, as of the last message dispatched
+        self._connection: tuple[bool, float | None] = (moebot.available, moebot.tuya_version)
+
+        self._remove_moebot_listener = self.moebot.add_listener(self._async_dispatch)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening to the MoeBot and drop every listener, so that nothing outlives the config entry."""
+        self._remove_moebot_listener()
+        self._listeners.clear()
+        self._every_message_listeners.clear()
+        self._dps_listeners.clear()
+
+    @callback
+    def _async_dispatch(self, raw_msg: dict[str, Any]) -> None:
+        """Pass a message to the listeners for the DPS it carries, on the event loop."""
+        connection = (self.moebot.available, self.moebot.tuya_version)
+        if self._connection != connection:
+            self._connection = connection
+            affected = self._listeners
+        else:
+            interested = set(self._every_message_listeners)
+            for dps in raw_msg.get("dps", {}):
+                interested.update(self._dps_listeners.get(dps, ()))
+            # The listeners are called in the order they registered, whatever order the message has its DPS in
+            affected = [listener for listener in self._listeners if listener in interested]
+
+        _log.debug("Dispatching update to %d listeners: %r", len(affected), raw_msg)
+        for listener in list(affected):
+            # This runs as the message is received; a listener that fails mustn't take the connection down with it
+            try:
+                listener(raw_msg)
+            except Exception:
+                _log.exception("Error updating a listener for MoeBot %s", self.moebot.id)
+
+    @callback
+    def async_add_listener(self, listener: UpdateListener, dps: Iterable[str] | None = None) -> CALLBACK_TYPE:
+        """Register a listener for updates to the given DPS, returning a callback that removes it again.
+
+        If no DPS are given, the listener is called for every message.
+        """
+        if dps is None:
+            registered = [self._listeners, self._every_message_listeners]
+        else:
+            registered = [self._listeners] + [self._dps_listeners.setdefault(dp, []) for dp in dps]
+
+        for listeners in registered:
+            listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            for listeners in registered:
+                listeners.remove(listener)
+
+        return remove_listener
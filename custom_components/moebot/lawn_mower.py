@@ -1,20 +1,22 @@
 import logging
 from builtins import super
+from typing import Any
+
+import voluptuous as vol
 
-import graphviz
-import networkx as nx
-import pydot
 from homeassistant.components.lawn_mower import LawnMowerEntity, LawnMowerEntityEntityDescription, \
     LawnMowerEntityFeature, LawnMowerActivity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from pymoebot import MoeBot
-from transitions.extensions import GraphMachine
 
-from custom_components.moebot import BaseMoeBotEntity
-from .const import DOMAIN
+from custom_components.moebot import OptimisticMoeBotEntity, MoeBotData
+from .const import DOMAIN, DPS_STATE, SERVICE_SET_ZONES
+from .dispatcher import MoeBotDispatcher
+from .state_machine import MoeBotStateMachine
+from .zones import MoeBotZoneWriter
 
 _STATUS_TO_HA = {
     "STANDBY": LawnMowerActivity.DOCKED,
@@ -29,6 +31,14 @@ _STATUS_TO_HA = {
     "ERROR": LawnMowerActivity.ERROR,
 }
 
+# The fields of the set_zones service, in the order of the values in a ZoneConfig
+_ZONE_FIELDS = [f"zone{zone}_{part}" for zone in range(1, 6) for part in ("distance", "ratio")]
+
+SET_ZONES_SCHEMA = {
+    vol.Required(field): vol.All(vol.Coerce(int), vol.Range(min=0, max=100 if field.endswith("ratio") else 200))
+    for field in _ZONE_FIELDS
+}
+
 _log = logging.getLogger(__package__)
 
 
@@ -36,71 +46,27 @@ async def async_setup_entry(hass: HomeAssistant,
                             entry: ConfigEntry,
                             async_add_entities: AddEntitiesCallback) -> None:
     """Set up MoeBot from a config entry."""
-    moebot = hass.data[DOMAIN][entry.entry_id]
+    data: MoeBotData = hass.data[DOMAIN][entry.entry_id]
 
-    moebot_entity = MoeBotMowerEntity(moebot)
+    moebot_entity = MoeBotMowerEntity(data.dispatcher, data.state_machine, data.zone_writer)
     async_add_entities([moebot_entity])
 
-
-class MoeBotStateMachine(GraphMachine):
-    states = ['STANDBY', 'MOWING', 'FIXED_MOWING', 'PAUSED', 'PARK', 'CHARGING', 'CHARGING_WITH_TASK_SUSPEND', 'LOCKED',
-              'EMERGENCY', 'ERROR']
-
-    def __init__(self, moebot: MoeBot):
-        super().__init__(self, states=self.states, use_pygraphviz=False,
-                         initial="STANDBY", auto_transitions=False)
-        _log.info(f"Graphviz: {graphviz.__version__}")
-        _log.info(f"PyDot: {pydot.__version__}")
-
-        self._moebot: MoeBot = moebot
-
-        # This call back ensures that the state of the state machine is kept in sync with the state of the
-        # MoeBot.
-        def __state_listener(raw_msg):
-            _log.debug("%r got an update: %r" % (self.__class__.__name__, raw_msg))
-            self.state = self._moebot.state
-
-        self._moebot.add_listener(__state_listener)
-        self.add_transition('StartMowing', 'CHARGING', 'MOWING',
-                            before=self._moebot.start)
-        self.add_transition('StartMowing', 'STANDBY', 'MOWING',
-                            before=self._moebot.start)
-        self.add_transition('PauseWork', 'MOWING', 'PAUSED',
-                            before=self._moebot.pause)
-        self.add_transition('ContinueWork', 'PAUSED', 'MOWING',
-                            before=self._moebot.start)
-        self.add_transition('CancelWork', 'PAUSED', 'STANDBY',
-                            before=self._moebot.cancel)
-        self.add_transition('StartReturnStation', 'STANDBY', 'PARK',
-                            before=self._moebot.dock)
-        self.add_transition('Error', '*', 'ERROR')
-        self.add_transition('Emergency', '*', 'EMERGENCY')
-        self.add_transition('Locked', '*', 'LOCKED')
-
-    def shortest_path(self, target):
-        # With thanks for support from @aleneum per https://github.com/pytransitions/transitions/discussions/679
-        graph = nx.drawing.nx_pydot.from_pydot(
-            pydot.graph_from_dot_data(self.get_graph().source)[0]
-        )
-        path = nx.shortest_path(graph, self.state, target)
-        # the pydot graph seems to be slightly different organized and returns a list of edges.
-        for trigger in (
-                graph[u][v][0].get("label") for u, v in nx.utils.pairwise(path)
-        ):
-            _log.debug(f"Executing {trigger}...")
-            self.trigger(trigger)
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(SERVICE_SET_ZONES, SET_ZONES_SCHEMA, "async_set_zones")
 
 
-class MoeBotMowerEntity(BaseMoeBotEntity, LawnMowerEntity):
+class MoeBotMowerEntity(OptimisticMoeBotEntity, LawnMowerEntity):
     entity_description: LawnMowerEntityEntityDescription
+    _dps = (DPS_STATE,)
     _attr_supported_features = (
             LawnMowerEntityFeature.DOCK
             | LawnMowerEntityFeature.PAUSE
             | LawnMowerEntityFeature.START_MOWING
     )
 
-    def __init__(self, moebot: MoeBot):
-        super().__init__(moebot)
+    def __init__(self, dispatcher: MoeBotDispatcher, state_machine: MoeBotStateMachine,
+                 zone_writer: MoeBotZoneWriter):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -117,19 +83,28 @@ class MoeBotMowerEntity(BaseMoeBotEntity, LawnMowerEntity):
             name=f"{self.name} ({self._moebot.id})",
         )
 
-        self._sm: MoeBotStateMachine = MoeBotStateMachine(self._moebot)
+        self._sm: MoeBotStateMachine = state_machine
+        self._zone_writer = zone_writer
+
+    @property
+    def _reported_value(self) -> LawnMowerActivity | None:
+        mb_state = self._moebot.state
+        return _STATUS_TO_HA.get(mb_state)
 
     @property
     def activity(self) -> LawnMowerActivity | None:
         """Return the state of the mower."""
-        mb_state = self._moebot.state
-        return _STATUS_TO_HA[mb_state]
+        return self._optimistic_value
+
+    async def async_start_mowing(self) -> None:
+        await self._async_request_value(LawnMowerActivity.MOWING, self._sm.shortest_path('MOWING'))
 
-    def start_mowing(self) -> None:
-        self._sm.shortest_path('MOWING')
+    async def async_dock(self) -> None:
+        await self._async_request_value(LawnMowerActivity.RETURNING, self._sm.shortest_path('PARK'))
 
-    def dock(self) -> None:
-        self._sm.shortest_path('PARK')
+    async def async_pause(self) -> None:
+        await self._async_request_value(LawnMowerActivity.PAUSED, self._sm.shortest_path('PAUSED'))
 
-    def pause(self) -> None:
-        self._sm.shortest_path('PAUSED')
+    async def async_set_zones(self, **kwargs: Any) -> None:
+        """Write the distance and ratio of all five zones to the MoeBot at once."""
+        await self._zone_writer.async_set_values(kwargs[field] for field in _ZONE_FIELDS)
@@ -5,30 +5,32 @@ from enum import Enum
 from homeassistant.components.number import NumberEntity, NumberMode, NumberDeviceClass
 from homeassistant.const import PERCENTAGE, UnitOfLength, UnitOfTime
 from homeassistant.helpers.entity import EntityCategory
-from pymoebot import ZoneConfig, MoeBot
 
-from . import BaseMoeBotEntity
-from .const import DOMAIN
+from . import OptimisticMoeBotEntity
+from .const import DOMAIN, DPS_MOW_TIME, DPS_ZONES
+from .dispatcher import MoeBotDispatcher
+from .zones import MoeBotZoneWriter
 
 _log = logging.getLogger(__package__)
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Add sensors for passed config_entry in HA."""
-    moebot = hass.data[DOMAIN][config_entry.entry_id]
+    data = hass.data[DOMAIN][config_entry.entry_id]
 
-    entities = [WorkingTimeNumber(moebot)]
+    entities = [WorkingTimeNumber(data.dispatcher)]
     for zone in range(1, 6):
         for part in ZoneNumberType:
-            entities.append(ZoneConfigNumber(moebot, zone, part))
+            entities.append(ZoneConfigNumber(data.dispatcher, data.zone_writer, zone, part))
 
     async_add_entities(entities)
 
 
-class WorkingTimeNumber(BaseMoeBotEntity, NumberEntity):
+class WorkingTimeNumber(OptimisticMoeBotEntity, NumberEntity):
+    _dps = (DPS_MOW_TIME,)
 
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -45,11 +47,15 @@ class WorkingTimeNumber(BaseMoeBotEntity, NumberEntity):
         self._attr_native_unit_of_measurement = UnitOfTime.HOURS
 
     @property
-    def native_value(self) -> float:
+    def _reported_value(self) -> int | None:
         return self._moebot.mow_time
 
-    def set_native_value(self, value: float) -> None:
-        self._moebot.mow_time = int(value)
+    @property
+    def native_value(self) -> float:
+        return self._optimistic_value
+
+    async def async_set_native_value(self, value: float) -> None:
+        await self._async_request_value(int(value), self._moebot.async_set_mow_time(int(value)))
 
 
 @dataclass
@@ -63,11 +69,16 @@ class ZoneNumberType(ZoneTypeDataMixin, Enum):
     RATIO = 'Ratio', 1
 
 
-class ZoneConfigNumber(BaseMoeBotEntity, NumberEntity):
-    def __init__(self, moebot: MoeBot, zone: int, part: ZoneNumberType):
-        super().__init__(moebot)
+class ZoneConfigNumber(OptimisticMoeBotEntity, NumberEntity):
+    _dps = (DPS_ZONES,)
+
+    def __init__(self, dispatcher: MoeBotDispatcher, zone_writer: MoeBotZoneWriter, zone: int, part: ZoneNumberType):
+        super().__init__(dispatcher)
+        self._zone_writer = zone_writer
         self.zone = zone
         self.part = part
+        # The position of this value in the MoeBot's zone values
+        self._index = (2 * (self.zone - 1)) + self.part.value.position
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -87,28 +98,19 @@ class ZoneConfigNumber(BaseMoeBotEntity, NumberEntity):
 
         self._attr_entity_registry_enabled_default = False
 
-    @classmethod
-    def zone_config_to_list(cls, zc: ZoneConfig):
-        return [int(zc.zone1[0]), int(zc.zone1[1]),
-                int(zc.zone2[0]), int(zc.zone2[1]),
-                int(zc.zone3[0]), int(zc.zone3[1]),
-                int(zc.zone4[0]), int(zc.zone4[1]),
-                int(zc.zone5[0]), int(zc.zone5[1]),
-                ]
-
     @property
-    def native_value(self) -> float:
-        if not self._moebot.zones:
+    def _reported_value(self) -> int | None:
+        zone_values = self._moebot.zone_values
+        if zone_values is None:
             _log.debug("Zone data hasn't been retrieved, can't provide values")
             return
 
-        zone_values = ZoneConfigNumber.zone_config_to_list(self._moebot.zones)
-
-        return zone_values[(2 * (self.zone - 1)) + self.part.value.position]
+        return zone_values[self._index]
 
-    def set_native_value(self, value: float) -> None:
-        new_zone_values = ZoneConfigNumber.zone_config_to_list(self._moebot.zones)
-        new_zone_values[(2 * (self.zone - 1)) + self.part.value.position] = int(value)
+    @property
+    def native_value(self) -> float:
+        return self._optimistic_value
 
-        zc = ZoneConfig(*new_zone_values)
-        self._moebot.zones = zc
+    async def async_set_native_value(self, value: float) -> None:
+        # Changes to the other zones made at about the same time are written along with this one
+        await self._async_request_value(int(value), self._zone_writer.async_set_value(self._index, int(value)))
@@ -1,35 +1,52 @@
 import logging
+import time
+from datetime import datetime
 
 from homeassistant.components.sensor import SensorEntity, SensorStateClass, SensorDeviceClass
 from homeassistant.const import (
-    PERCENTAGE, )
+    PERCENTAGE, UnitOfTime, )
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.icon import icon_for_battery_level
+from homeassistant.util import dt as dt_util
 
 from . import BaseMoeBotEntity
-from .const import DOMAIN
+from .const import DOMAIN, DPS_BATTERY, DPS_BATTERY_ALT, DPS_EMERGENCY_STATE, DPS_STATE, DPS_WORK_MODE, \
+    CONF_LAST_MESSAGE_THROTTLE, DEFAULT_LAST_MESSAGE_THROTTLE
+from .battery import MoeBotBatteryPredictor
+from .sessions import MoeBotSessionTracker
 
 _log = logging.getLogger()
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Add sensors for passed config_entry in HA."""
-    moebot = hass.data[DOMAIN][config_entry.entry_id]
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    dispatcher = data.dispatcher
+    throttle = config_entry.options.get(CONF_LAST_MESSAGE_THROTTLE, DEFAULT_LAST_MESSAGE_THROTTLE)
 
     async_add_entities(
-        [MowingStateSensor(moebot), BatterySensor(moebot), EmergencyStateSensor(moebot), WorkModeSensor(moebot),
-         PyMoebotVersionSensor(moebot), TuyaVersionSensor(moebot)])
+        [MowingStateSensor(dispatcher), BatterySensor(dispatcher), EmergencyStateSensor(dispatcher),
+         WorkModeSensor(dispatcher), PyMoebotVersionSensor(dispatcher), TuyaVersionSensor(dispatcher),
+         LastMessageSensor(dispatcher, throttle),
+         MowingTimeTodaySensor(dispatcher, data.sessions), MowingTimeWeekSensor(dispatcher, data.sessions),
+         MowingSessionsTodaySensor(dispatcher, data.sessions), BatteryDrainSensor(dispatcher, data.sessions),
+         BatteryTimeRemainingSensor(dispatcher, data.battery_predictor),
+         BatteryTimeToFullSensor(dispatcher, data.battery_predictor)])
 
 
 class SensorBase(BaseMoeBotEntity, SensorEntity):
-    def __init__(self, moebot):
+    def __init__(self, dispatcher):
         """Initialize the sensor."""
-        super().__init__(moebot)
+        super().__init__(dispatcher)
 
 
 class MowingStateSensor(SensorBase):
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    _dps = (DPS_STATE,)
+
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -48,8 +65,10 @@ class MowingStateSensor(SensorBase):
 
 
 class EmergencyStateSensor(SensorBase):
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    _dps = (DPS_EMERGENCY_STATE,)
+
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -68,8 +87,10 @@ class EmergencyStateSensor(SensorBase):
 
 
 class WorkModeSensor(SensorBase):
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    _dps = (DPS_WORK_MODE,)
+
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -88,9 +109,12 @@ class WorkModeSensor(SensorBase):
 
 
 class BatterySensor(SensorBase):
-    def __init__(self, moebot):
+    # The icon shows whether the MoeBot is charging, so this also depends on the state
+    _dps = (DPS_BATTERY, DPS_BATTERY_ALT, DPS_STATE)
+
+    def __init__(self, dispatcher):
         """Initialize the sensor."""
-        super().__init__(moebot)
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -106,8 +130,10 @@ class BatterySensor(SensorBase):
     # The value of this sensor. As this is a SensorDeviceClass.BATTERY, this value must be
     # the battery level as a percentage (between 0 and 100)
     @property
-    def state(self) -> int:
+    def state(self) -> int | None:
         """Return the state of the sensor."""
+        if self._moebot.battery is None:
+            return None
         return round(self._moebot.battery)
 
     @property
@@ -124,8 +150,8 @@ class BatterySensor(SensorBase):
 
 
 class PyMoebotVersionSensor(SensorBase):
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -143,8 +169,8 @@ class PyMoebotVersionSensor(SensorBase):
 
 
 class TuyaVersionSensor(SensorBase):
-    def __init__(self, moebot):
-        super().__init__(moebot)
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -159,3 +185,205 @@ class TuyaVersionSensor(SensorBase):
     def state(self):
         """Return the state of the sensor."""
         return self._moebot.tuya_version
+
+
+class LastMessageSensor(SensorBase):
+    # Every message with data is of interest to this sensor; the heartbeats carry none and don't change the time
+    _dps = None
+
+    def __init__(self, dispatcher, throttle: int):
+        super().__init__(dispatcher)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_last_message"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+        # The name of the entity
+        self._attr_name = "Last Message Received"
+
+        # The MoeBot reports its state every few seconds while mowing, so only write it once per throttle period.
+        self._throttle: int = throttle
+        self._last_write: float = 0.0
+        self._cancel_write = None
+
+    # The value of this sensor.
+    @property
+    def native_value(self) -> datetime | None:
+        """Return the time the last message was received from the MoeBot."""
+        if self._moebot.last_update is None:
+            return None
+        return dt_util.utc_from_timestamp(self._moebot.last_update)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_throttled_write)
+
+    @callback
+    def _handle_update(self, raw_msg) -> None:
+        if self._cancel_write is not None:
+            # A write is already scheduled and will show this message
+            return
+
+        delay = self._last_write + self._throttle - time.monotonic()
+        if delay <= 0:
+            self._throttled_write()
+        else:
+            self._cancel_write = async_call_later(self.hass, delay, self._throttled_write)
+
+    @callback
+    def _throttled_write(self, _now=None) -> None:
+        self._cancel_write = None
+        self._last_write = time.monotonic()
+        self.async_write_ha_state()
+
+    @callback
+    def _cancel_throttled_write(self) -> None:
+        if self._cancel_write is not None:
+            self._cancel_write()
+            self._cancel_write = None
+
+
+class SessionSensorBase(SensorBase):
+    """A statistic of the MoeBot's mowing sessions, updated by the session tracker rather than by messages."""
+    _dps = ()
+
+    def __init__(self, dispatcher, sessions: MoeBotSessionTracker):
+        super().__init__(dispatcher)
+        self._sessions = sessions
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._sessions.add_listener(self.async_write_ha_state))
+
+
+class MowingTimeTodaySensor(SessionSensorBase):
+    def __init__(self, dispatcher, sessions: MoeBotSessionTracker):
+        super().__init__(dispatcher, sessions)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_mowing_time_today"
+
+        self._attr_name = "Mowing Time Today"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_native_unit_of_measurement = UnitOfTime.HOURS
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_suggested_display_precision = 2
+
+    @property
+    def native_value(self) -> float:
+        return self._sessions.mowing_hours_today
+
+
+class MowingTimeWeekSensor(SessionSensorBase):
+    def __init__(self, dispatcher, sessions: MoeBotSessionTracker):
+        super().__init__(dispatcher, sessions)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_mowing_time_week"
+
+        # The last seven days, including today
+        self._attr_name = "Mowing Time Last 7 Days"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_native_unit_of_measurement = UnitOfTime.HOURS
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 2
+
+    @property
+    def native_value(self) -> float:
+        return self._sessions.mowing_hours_week
+
+
+class MowingSessionsTodaySensor(SessionSensorBase):
+    def __init__(self, dispatcher, sessions: MoeBotSessionTracker):
+        super().__init__(dispatcher, sessions)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_mowing_sessions_today"
+
+        self._attr_name = "Mowing Sessions Today"
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        return self._sessions.sessions_today
+
+    @property
+    def extra_state_attributes(self):
+        attributes = dict(super().extra_state_attributes or {})
+        if sessions := self._sessions.sessions:
+            last = sessions[-1]
+            attributes["last_session_start"] = dt_util.utc_from_timestamp(last["start"])
+            attributes["last_session_end"] = dt_util.utc_from_timestamp(last["end"])
+            attributes["last_session_battery_used"] = last["battery_used"]
+            attributes["last_session_end_reason"] = last["reason"]
+        return attributes or None
+
+
+class BatteryDrainSensor(SessionSensorBase):
+    def __init__(self, dispatcher, sessions: MoeBotSessionTracker):
+        super().__init__(dispatcher, sessions)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_battery_drain"
+
+        # The average over the sessions remembered
+        self._attr_name = "Battery Used Per Mowing Hour"
+        self._attr_native_unit_of_measurement = f"{PERCENTAGE}/{UnitOfTime.HOURS}"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 1
+
+    @property
+    def native_value(self) -> float | None:
+        return self._sessions.battery_drain_per_hour
+
+
+class BatteryPredictionSensorBase(SensorBase):
+    """An estimate from the battery predictor, which is updated before the entities on each message."""
+    _dps = (DPS_BATTERY, DPS_BATTERY_ALT, DPS_STATE)
+
+    def __init__(self, dispatcher, predictor: MoeBotBatteryPredictor):
+        super().__init__(dispatcher)
+        self._predictor = predictor
+
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_native_unit_of_measurement = UnitOfTime.MINUTES
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 0
+
+
+class BatteryTimeRemainingSensor(BatteryPredictionSensorBase):
+    def __init__(self, dispatcher, predictor: MoeBotBatteryPredictor):
+        super().__init__(dispatcher, predictor)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_battery_time_remaining"
+
+        # Only known while the MoeBot is mowing
+        self._attr_name = "Battery Time Remaining"
+
+    @property
+    def native_value(self) -> float | None:
+        return self._predictor.minutes_remaining
+
+
+class BatteryTimeToFullSensor(BatteryPredictionSensorBase):
+    def __init__(self, dispatcher, predictor: MoeBotBatteryPredictor):
+        super().__init__(dispatcher, predictor)
+
+        # A unique_id for this entity within this domain.
+        # Note: This is NOT used to generate the user visible Entity ID used in automations.
+        self._attr_unique_id = f"{self._moebot.id}_battery_time_to_full"
+
+        # Only known while the MoeBot is charging
+        self._attr_name = "Battery Time To Full"
+
+    @property
+    def native_value(self) -> float | None:
+        return self._predictor.minutes_to_full
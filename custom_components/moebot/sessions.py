@@ -0,0 +1,265 @@
+"""Records a MoeBot's mowing sessions and keeps running statistics about them."""
+from __future__ import annotations
+
+import logging
+from collections import deque
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change, async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DPS_STATE
+from .dispatcher import MoeBotDispatcher
+
+_log = logging.getLogger(__package__)
+
+STORAGE_VERSION = 1
+# Sessions are saved a short while after they start or end
+SESSION_SAVE_DELAY = 10  # seconds
+
+# The number of sessions remembered
+SESSION_HISTORY = 200
+# The number of days of mowing time kept, for the weekly total
+DAYS_KEPT = 7
+
+# How often the statistics are refreshed while the MoeBot is mowing
+SESSION_UPDATE_INTERVAL = timedelta(minutes=1)
+
+# A session starts when the MoeBot starts mowing; it carries on while it is paused or heading back to the dock
+MOWING_STATES = ("MOWING", "FIXED_MOWING")
+SESSION_STATES = MOWING_STATES + ("PAUSED", "PARK")
+
+# Why a session ended, by the state the MoeBot ended it in
+END_REASONS = {
+    "STANDBY": "docked",
+    "CHARGING": "docked",
+    # The MoeBot went back to its dock, to charge or to shelter from the rain, and will carry on afterwards
+    "CHARGING_WITH_TASK_SUSPEND": "suspended",
+    "EMERGENCY": "error",
+    "ERROR": "error",
+    "LOCKED": "error",
+}
+
+
+def _session_store(hass: HomeAssistant, device_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{device_id}.sessions")
+
+
+async def async_remove_sessions(hass: HomeAssistant, device_id: str) -> None:
+    """Forget the sessions recorded for a MoeBot."""
+    await _session_store(hass, device_id).async_remove()
+
+
+class MoeBotSessionTracker:
+    """Records each of a MoeBot's mowing sessions; its start and end, the battery it used and why it ended.
+
+    The statistics are kept as running totals, updated as each session ends, so that reading them doesn't mean
+    going through the history.
+    """
+
+    def __init__(self, hass: HomeAssistant, dispatcher: MoeBotDispatcher) -> None:
+        self._hass = hass
+        self._moebot = dispatcher.moebot
+        self._store = _session_store(hass, self._moebot.id)
+        self._listeners: list[Callable[[], None]] = []
+
+        self._sessions: deque[dict[str, Any]] = deque(maxlen=SESSION_HISTORY)
+        self._current: dict[str, Any] | None = None
+        # Whether the MoeBot has reported its state since it was last connected to; until it has, its state is the
+        # one restored from before Home Assistant was restarted, or from before the connection was lost
+        self._live = False
+
+        # Running totals over the sessions remembered, for the average battery drain
+        self._total_seconds: float = 0
+        self._total_battery: int = 0
+        # The seconds mown and the sessions started on each of the last few days, keyed on the (local) date
+        self._daily_seconds: dict[date, float] = {}
+        self._daily_sessions: dict[date, int] = {}
+
+        self._cancel_update: CALLBACK_TYPE | None = None
+        self._remove_listeners: list[CALLBACK_TYPE] = [
+            dispatcher.async_add_listener(self._state_received, (DPS_STATE,)),
+            # The daily statistics start again at midnight
+            async_track_time_change(hass, self._midnight, hour=0, minute=0, second=0),
+        ]
+
+    async def async_load(self) -> None:
+        """Load the sessions recorded before Home Assistant was last stopped."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        for session in stored.get("sessions", []):
+            self._add_session(session)
+        self._current = stored.get("current")
+        if self._current is not None:
+            start_day = self._local_date(self._current["start"])
+            self._daily_sessions[start_day] = self._daily_sessions.get(start_day, 0) + 1
+            self._start_updates()
+
+    @callback
+    def async_shutdown(self) -> None:
+        for remove in self._remove_listeners:
+            remove()
+        self._remove_listeners.clear()
+        self._stop_updates()
+        self._listeners.clear()
+
+    async def async_save(self) -> None:
+        await self._store.async_save(self._data())
+
+    @callback
+    def add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call listener whenever the statistics change; returns a function to remove it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    @property
+    def sessions(self) -> list[dict[str, Any]]:
+        """Return the sessions remembered, oldest first, not including the one in progress."""
+        return list(self._sessions)
+
+    @property
+    def current(self) -> dict[str, Any] | None:
+        return self._current
+
+    @property
+    def mowing_hours_today(self) -> float:
+        return self._mowing_seconds(1) / 3600
+
+    @property
+    def mowing_hours_week(self) -> float:
+        return self._mowing_seconds(DAYS_KEPT) / 3600
+
+    @property
+    def sessions_today(self) -> int:
+        return self._daily_sessions.get(dt_util.now().date(), 0)
+
+    @property
+    def battery_drain_per_hour(self) -> float | None:
+        """Return the average battery used per hour of mowing, as a percentage."""
+        if self._total_seconds <= 0:
+            return None
+        return self._total_battery / (self._total_seconds / 3600)
+
+    def _mowing_seconds(self, days: int) -> float:
+        today = dt_util.now().date()
+        seconds = sum(self._daily_seconds.get(today - timedelta(days=day), 0) for day in range(days))
+        if self._current is not None:
+            # Only the part of the session in progress since the start of the first day counts
+            start = dt_util.start_of_local_day(today - timedelta(days=days - 1)).timestamp()
+            seconds += dt_util.utcnow().timestamp() - max(self._current["start"], start)
+        return seconds
+
+    @callback
+    def _state_received(self, raw_msg) -> None:
+        if DPS_STATE not in raw_msg.get("dps", {}):
+            # The MoeBot has become available or unavailable, which says nothing about what it is doing
+            self._live = self._live and self._moebot.online
+            return
+
+        state = self._moebot.state
+        reconnected, self._live = not self._live, True
+        if self._current is None and state in MOWING_STATES:
+            self._start_session()
+        elif self._current is not None and state in SESSION_STATES:
+            self._current["last_seen"] = dt_util.utcnow().timestamp()
+        elif self._current is not None and state in END_REASONS:
+            # A session that ended while the MoeBot wasn't connected to ended some time after it was last seen
+            self._end_session(END_REASONS[state], self._current.get("last_seen") if reconnected else None)
+
+    def _start_session(self) -> None:
+        now = dt_util.utcnow().timestamp()
+        self._current = {"start": now, "last_seen": now, "battery_start": self._moebot.battery}
+        today = dt_util.now().date()
+        self._daily_sessions[today] = self._daily_sessions.get(today, 0) + 1
+        _log.debug("Mowing session started: %r", self._current)
+        self._start_updates()
+        self._changed()
+
+    def _end_session(self, reason: str, end: float | None = None) -> None:
+        session, self._current = self._current, None
+        session.pop("last_seen", None)
+        session["end"] = end if end is not None else dt_util.utcnow().timestamp()
+        session["duration"] = session["end"] - session["start"]
+        if session["battery_start"] is not None and self._moebot.battery is not None:
+            session["battery_used"] = max(0, session["battery_start"] - self._moebot.battery)
+        else:
+            session["battery_used"] = None
+        session["reason"] = reason
+        _log.debug("Mowing session ended: %r", session)
+
+        self._stop_updates()
+        self._add_session(session, counted=True)
+        self._changed()
+
+    def _add_session(self, session: dict[str, Any], counted: bool = False) -> None:
+        """Remember a session, adding it to the running totals and taking out the one it pushes out of the history."""
+        if len(self._sessions) == self._sessions.maxlen:
+            self._remove_from_totals(self._sessions[0])
+        self._sessions.append(session)
+
+        if session.get("battery_used") is not None:
+            self._total_seconds += session["duration"]
+            self._total_battery += session["battery_used"]
+
+        # The session may have run over midnight, the time is added to the days it was mown on
+        today = dt_util.now().date()
+        start, end = dt_util.utc_from_timestamp(session["start"]), dt_util.utc_from_timestamp(session["end"])
+        day = dt_util.as_local(start).date()
+        while day <= dt_util.as_local(end).date():
+            if (today - day).days < DAYS_KEPT:
+                day_start = max(start, dt_util.start_of_local_day(day))
+                day_end = min(end, dt_util.start_of_local_day(day + timedelta(days=1)))
+                self._daily_seconds[day] = self._daily_seconds.get(day, 0) + (day_end - day_start).total_seconds()
+            day += timedelta(days=1)
+        # The sessions started today are counted as they start
+        if not counted and (today - (start_day := self._local_date(session["start"]))).days < DAYS_KEPT:
+            self._daily_sessions[start_day] = self._daily_sessions.get(start_day, 0) + 1
+
+    def _remove_from_totals(self, session: dict[str, Any]) -> None:
+        if session.get("battery_used") is not None:
+            self._total_seconds -= session["duration"]
+            self._total_battery -= session["battery_used"]
+
+    @staticmethod
+    def _local_date(timestamp: float) -> date:
+        return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date()
+
+    def _data(self) -> dict[str, Any]:
+        return {"sessions": list(self._sessions), "current": self._current}
+
+    def _changed(self) -> None:
+        self._store.async_delay_save(self._data, SESSION_SAVE_DELAY)
+        for listener in list(self._listeners):
+            listener()
+
+    def _start_updates(self) -> None:
+        if self._cancel_update is None:
+            self._cancel_update = async_track_time_interval(self._hass, self._update, SESSION_UPDATE_INTERVAL)
+
+    def _stop_updates(self) -> None:
+        if self._cancel_update is not None:
+            self._cancel_update()
+            self._cancel_update = None
+
+    @callback
+    def _update(self, _now) -> None:
+        if self._live and self._current is not None:
+            # Saved, so that a session that ends while Home Assistant is stopped ends about when it was last seen
+            self._current["last_seen"] = dt_util.utcnow().timestamp()
+            self._store.async_delay_save(self._data, SESSION_SAVE_DELAY)
+        # The time mown so far in the session in progress changes
+        for listener in list(self._listeners):
+            listener()
+
+    @callback
+    def _midnight(self, _now) -> None:
+        oldest = dt_util.now().date() - timedelta(days=DAYS_KEPT - 1)
+        for daily in (self._daily_seconds, self._daily_sessions):
+            for day in [day for day in daily if day < oldest]:
+                del daily[day]
+        for listener in list(self._listeners):
+            listener()
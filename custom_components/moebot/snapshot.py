@@ -0,0 +1,61 @@
+"""Keeps what was last known about each MoeBot on disk, so that its entities have values as soon as HA starts."""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .device import MoeBotDevice
+
+_log = logging.getLogger(__package__)
+
+STORAGE_VERSION = 1
+
+# The MoeBot reports its data points every few seconds while it is working; the snapshot is written once this long
+# after the first data points that haven't been saved
+SNAPSHOT_SAVE_DELAY = 60  # seconds
+
+
+class MoeBotSnapshotStore:
+    """The snapshot of a MoeBot, saved a short while after it changes.
+
+    The snapshot is the MoeBot's last reported data points, along with the IP address and Tuya version that worked.
+    """
+
+    def __init__(self, hass: HomeAssistant, device_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{device_id}")
+        # When the save that is waiting will be made, as a monotonic time
+        self._save_due: float | None = None
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return await self._store.async_load()
+
+    @callback
+    def async_track(self, moebot: MoeBotDevice) -> Callable[[], None]:
+        """Save the MoeBot's snapshot whenever it reports data points; returns a function to stop."""
+
+        @callback
+        def _message_received(raw_msg: dict[str, Any]) -> None:
+            if not raw_msg.get("dps"):
+                return
+            # Delaying the save again would put it off for as long as messages keep arriving; every message until
+            # the save that is waiting is made is saved by it, as the snapshot is taken when it is written
+            now = time.monotonic()
+            if self._save_due is None or now >= self._save_due:
+                self._save_due = now + SNAPSHOT_SAVE_DELAY
+                self._store.async_delay_save(lambda: moebot.snapshot, SNAPSHOT_SAVE_DELAY)
+
+        return moebot.add_listener(_message_received)
+
+    async def async_save(self, moebot: MoeBotDevice) -> None:
+        """Save the MoeBot's snapshot now, rather than waiting for the delayed save."""
+        self._save_due = None
+        await self._store.async_save(moebot.snapshot)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
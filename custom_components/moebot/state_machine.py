@@ -0,0 +1,124 @@
+"""The state machine that tracks a MoeBot."""
+import logging
+from builtins import super
+from collections import deque
+
+from homeassistant.exceptions import HomeAssistantError
+from transitions.extensions.asyncio import AsyncMachine
+
+from .const import DPS_STATE
+from .device import MoeBotDevice
+from .dispatcher import MoeBotDispatcher
+
+_log = logging.getLogger(__package__)
+
+
+class MoeBotStateMachine(AsyncMachine):
+    """Tracks the state of a MoeBot and plans the commands needed to move it to another state."""
+
+    states = ['STANDBY', 'MOWING', 'FIXED_MOWING', 'PAUSED', 'PARK', 'CHARGING', 'CHARGING_WITH_TASK_SUSPEND', 'LOCKED',
+              'EMERGENCY', 'ERROR']
+
+    def __init__(self, dispatcher: MoeBotDispatcher):
+        # The triggers to fire to get from one state to another, keyed on (source, dest).
+        self._trigger_plan: dict[tuple[str, str], tuple[str, ...]] | None = None
+
+        super().__init__(self, states=self.states, initial="STANDBY", auto_transitions=False)
+
+        self._moebot: MoeBotDevice = dispatcher.moebot
+
+        # This call back ensures that the state of the state machine is kept in sync with the state of the
+        # MoeBot.
+        def __state_listener(raw_msg):
+            _log.debug("%r got an update: %r" % (self.__class__.__name__, raw_msg))
+            self.state = self._moebot.state
+
+        dispatcher.async_add_listener(__state_listener, (DPS_STATE,))
+        # Start from the last state known, the MoeBot may not have been connected to yet
+        if self._moebot.state in self.states:
+            self.state = self._moebot.state
+        self.add_transition('StartMowing', 'CHARGING', 'MOWING',
+                            before=self._moebot.async_start)
+        self.add_transition('StartMowing', 'STANDBY', 'MOWING',
+                            before=self._moebot.async_start)
+        self.add_transition('PauseWork', 'MOWING', 'PAUSED',
+                            before=self._moebot.async_pause)
+        self.add_transition('ContinueWork', 'PAUSED', 'MOWING',
+                            before=self._moebot.async_start)
+        self.add_transition('CancelWork', 'PAUSED', 'STANDBY',
+                            before=self._moebot.async_cancel)
+        self.add_transition('StartReturnStation', 'STANDBY', 'PARK',
+                            before=self._moebot.async_dock)
+        self.add_transition('Error', '*', 'ERROR')
+        self.add_transition('Emergency', '*', 'EMERGENCY')
+        self.add_transition('Locked', '*', 'LOCKED')
+
+        self._build_trigger_plan()
+
+    def add_transition(self, trigger, source, dest, *args, **kwargs):
+        super().add_transition(trigger, source, dest, *args, **kwargs)
+        # The plan is rebuilt the next time it is needed
+        self._trigger_plan = None
+
+    def remove_transition(self, trigger, source="*", dest="*"):
+        super().remove_transition(trigger, source, dest)
+        self._trigger_plan = None
+
+    def _build_trigger_plan(self) -> None:
+        """Find the shortest sequence of triggers between every pair of states.
+
+        There are only a handful of states and transitions, so a breadth first search from each state is cheap and
+        turns every later lookup into a dict access.
+        """
+        edges: dict[str, list[tuple[str, str]]] = {state: [] for state in self.states}
+        for trigger, event in self.events.items():
+            for source, transitions in event.transitions.items():
+                for transition in transitions:
+                    if transition.dest is not None:
+                        edges[source].append((trigger, transition.dest))
+
+        plan = {}
+        for start in edges:
+            paths: dict[str, tuple[str, ...]] = {start: ()}
+            queue = deque([start])
+            while queue:
+                state = queue.popleft()
+                for trigger, dest in edges[state]:
+                    if dest not in paths:
+                        paths[dest] = paths[state] + (trigger,)
+                        queue.append(dest)
+            for dest, triggers in paths.items():
+                plan[(start, dest)] = triggers
+
+        _log.debug("Built a trigger plan covering %d state pairs", len(plan))
+        self._trigger_plan = plan
+
+    async def shortest_path(self, target):
+        if self._trigger_plan is None:
+            self._build_trigger_plan()
+
+        triggers = self._trigger_plan.get((self.state, target))
+        if triggers is None:
+            raise HomeAssistantError(f"The MoeBot can't get from {self.state} to {target}")
+
+        for trigger in triggers:
+            _log.debug(f"Executing {trigger}...")
+            await self.trigger(trigger)
+
+    def get_graph_source(self) -> str:
+        """Render the state machine as Graphviz DOT source.
+
+        This is only needed for diagnostics, so graphviz is imported when it is asked for rather than when the
+        integration is loaded. It should be called from the executor.
+        """
+        import graphviz
+
+        graph = graphviz.Digraph(name="MoeBot", graph_attr={"rankdir": "LR"})
+        for state in self.states:
+            graph.node(state, shape="doublecircle" if state == self.state else "circle")
+        for trigger, event in self.events.items():
+            for source, transitions in event.transitions.items():
+                for transition in transitions:
+                    if transition.dest is not None:
+                        graph.edge(source, transition.dest, label=trigger)
+        return graph.source
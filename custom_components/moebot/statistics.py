@@ -0,0 +1,130 @@
+"""Keeps hourly long-term statistics of a MoeBot's battery and mowing time, without the recorder's state history."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from homeassistant.const import PERCENTAGE, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DPS_BATTERY, DPS_BATTERY_ALT, DPS_STATE
+from .dispatcher import MoeBotDispatcher
+from .sessions import MOWING_STATES
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import StatisticMetaData
+
+_log = logging.getLogger(__package__)
+
+
+def _hour_start(when: datetime) -> datetime:
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+class MoeBotStatistics:
+    """Works out the MoeBot's battery (min, mean and max) and minutes mown for each hour, as it reports them.
+
+    The statistics are added to the recorder as external statistics at the end of each hour, so that the battery
+    sensor can be excluded from the recorder without losing its long-term history. The hour in progress when the
+    entry is unloaded is not added.
+    """
+
+    def __init__(self, hass: HomeAssistant, dispatcher: MoeBotDispatcher) -> None:
+        self._hass = hass
+        self._moebot = dispatcher.moebot
+        object_id = self._moebot.id.lower()
+        self._battery_id = f"{DOMAIN}:battery_{object_id}"
+        self._mowing_id = f"{DOMAIN}:mowing_time_{object_id}"
+        # The total minutes mown, carried on from the last hour added
+        self._mowing_sum: float | None = None
+
+        now = dt_util.utcnow()
+        self._hour = _hour_start(now)
+        self._since = now
+        self._battery = self._moebot.battery
+        self._mowing = self._moebot.state in MOWING_STATES
+        self._reset_hour()
+
+        self._remove_listeners: list[CALLBACK_TYPE] = [
+            dispatcher.async_add_listener(self._received, (DPS_BATTERY, DPS_BATTERY_ALT, DPS_STATE)),
+            async_track_utc_time_change(hass, self._end_of_hour, minute=0, second=0),
+        ]
+
+    async def async_load(self) -> None:
+        """Carry on the total minutes mown from the last hour added to the recorder."""
+        # The recorder is only imported once it is known to be loaded
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        last = await get_instance(self._hass).async_add_executor_job(
+            get_last_statistics, self._hass, 1, self._mowing_id, False, {"sum"})
+        if rows := last.get(self._mowing_id):
+            self._mowing_sum = rows[0]["sum"]
+
+    @callback
+    def async_shutdown(self) -> None:
+        for remove in self._remove_listeners:
+            remove()
+        self._remove_listeners.clear()
+
+    def _reset_hour(self) -> None:
+        # The battery weighted by how long it was at each level, and over how long it was known
+        self._battery_weighted: float = 0
+        self._battery_seconds: float = 0
+        self._battery_min: int | None = self._battery
+        self._battery_max: int | None = self._battery
+        self._mowing_seconds: float = 0
+
+    def _accumulate(self, now: datetime) -> None:
+        """Add the time since the last update, at the battery level and mowing state then, to the hour's figures."""
+        seconds = (now - self._since).total_seconds()
+        self._since = now
+        if self._battery is not None:
+            self._battery_weighted += self._battery * seconds
+            self._battery_seconds += seconds
+        if self._mowing:
+            self._mowing_seconds += seconds
+
+    @callback
+    def _received(self, raw_msg) -> None:
+        self._accumulate(dt_util.utcnow())
+        self._battery = self._moebot.battery
+        self._mowing = self._moebot.state in MOWING_STATES
+        if self._battery is not None:
+            self._battery_min = min(self._battery, self._battery_min if self._battery_min is not None else 100)
+            self._battery_max = max(self._battery, self._battery_max if self._battery_max is not None else 0)
+
+    @callback
+    def _end_of_hour(self, now: datetime) -> None:
+        from homeassistant.components.recorder.models import StatisticData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        # The figures up to the top of the hour belong to the hour that has just ended
+        end = _hour_start(now)
+        if end <= self._hour:
+            return
+        self._accumulate(end)
+        start, self._hour = self._hour, end
+
+        if self._battery_seconds > 0:
+            async_add_external_statistics(self._hass, self._metadata(self._battery_id, "battery", PERCENTAGE, True), [
+                StatisticData(start=start, mean=self._battery_weighted / self._battery_seconds,
+                              min=self._battery_min, max=self._battery_max)])
+
+        minutes = self._mowing_seconds / 60
+        self._mowing_sum = (self._mowing_sum or 0) + minutes
+        async_add_external_statistics(
+            self._hass, self._metadata(self._mowing_id, "mowing time", UnitOfTime.MINUTES, False),
+            [StatisticData(start=start, state=minutes, sum=self._mowing_sum)])
+        _log.debug("Added the statistics for the hour from %s", start)
+
+        self._reset_hour()
+
+    def _metadata(self, statistic_id: str, name: str, unit: str, has_mean: bool) -> StatisticMetaData:
+        from homeassistant.components.recorder.models import StatisticMetaData
+
+        return StatisticMetaData(has_mean=has_mean, has_sum=not has_mean, name=f"MoeBot {self._moebot.id} {name}",
+                                 source=DOMAIN, statistic_id=statistic_id, unit_of_measurement=unit)
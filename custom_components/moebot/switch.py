@@ -3,25 +3,26 @@ from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.entity import EntityCategory
-from pymoebot import MoeBot
 
-from . import BaseMoeBotEntity
-from .const import DOMAIN
+from . import OptimisticMoeBotEntity
+from .const import DOMAIN, DPS_MOW_IN_RAIN
+from .dispatcher import MoeBotDispatcher
 
 _log = logging.getLogger(__package__)
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Add sensors for passed config_entry in HA."""
-    moebot = hass.data[DOMAIN][config_entry.entry_id]
+    dispatcher = hass.data[DOMAIN][config_entry.entry_id].dispatcher
 
-    async_add_entities([ParkWhenRainingSwitch(moebot)])
+    async_add_entities([ParkWhenRainingSwitch(dispatcher)])
 
 
-class ParkWhenRainingSwitch(BaseMoeBotEntity, SwitchEntity):
+class ParkWhenRainingSwitch(OptimisticMoeBotEntity, SwitchEntity):
+    _dps = (DPS_MOW_IN_RAIN,)
 
-    def __init__(self, moebot: MoeBot):
-        super().__init__(moebot)
+    def __init__(self, dispatcher: MoeBotDispatcher):
+        super().__init__(dispatcher)
 
         # A unique_id for this entity within this domain.
         # Note: This is NOT used to generate the user visible Entity ID used in automations.
@@ -31,11 +32,15 @@ class ParkWhenRainingSwitch(BaseMoeBotEntity, SwitchEntity):
         self._attr_name = f"Park If Raining"
 
     @property
-    def is_on(self) -> bool:
+    def _reported_value(self) -> bool | None:
         return self._moebot.mow_in_rain
 
-    def turn_on(self, **kwargs: Any) -> None:
-        self._moebot.mow_in_rain = True
+    @property
+    def is_on(self) -> bool:
+        return self._optimistic_value
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        await self._async_request_value(True, self._moebot.async_set_mow_in_rain(True))
 
-    def turn_off(self, **kwargs: Any) -> None:
-        self._moebot.mow_in_rain = False
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        await self._async_request_value(False, self._moebot.async_set_mow_in_rain(False))
@@ -0,0 +1,274 @@
+"""An asyncio transport for the Tuya local protocol spoken by the MoeBot.
+
+Supports Tuya protocol versions 3.3, 3.4 and 3.5. The message framing and the encryption primitives come from
+tinytuya; this module provides the non-blocking transport around them so that a MoeBot can be driven directly from
+the Home Assistant event loop, without a thread per device or blocking an executor slot for every command.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import hmac
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+from hashlib import sha256
+from typing import Any
+
+import tinytuya
+from pymoebot import MoeBotConnectionError
+
+_log = logging.getLogger(__package__)
+
+TUYA_PORT = 6668
+RESPONSE_TIMEOUT = 5  # seconds
+
+# The header of a 6699 (v3.5) frame is the longest
+_MAX_HEADER_LEN = 18
+
+# The command a device uses to respond to each request, where it is not the same command
+_RESPONSE_COMMANDS = {
+    tinytuya.SESS_KEY_NEG_START: tinytuya.SESS_KEY_NEG_RESP,
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _cipher(key: bytes) -> tinytuya.AESCipher:
+    """Return the cipher for a key, shared by every connection and message that uses the key."""
+    return tinytuya.AESCipher(key)
+
+
+class TuyaProtocol(asyncio.Protocol):
+    """A connection to a single Tuya device.
+
+    Requests that expect a response (status queries, heartbeats and the session key negotiation) are matched to the
+    response by its command. Every message that carries data points (DPS), whether it is a response or was pushed by
+    the device, is passed to on_message, along with whether the device pushed it unasked.
+    """
+
+    def __init__(self, device_id: str, local_key: str, version: float,
+                 on_message: Callable[[dict[str, Any], bool], None],
+                 on_connection_lost: Callable[[TuyaProtocol, Exception | None], None]) -> None:
+        self.device_id = device_id
+        self.version = version
+        self._version_bytes = str(version).encode("latin1")
+        self._version_header = self._version_bytes + tinytuya.PROTOCOL_3x_HEADER
+        self._real_key = local_key.encode("latin1")
+        # v3.4 and above negotiate a key for each session, earlier versions always use the local key.
+        self._session_key = self._real_key
+
+        self._on_message = on_message
+        self._on_connection_lost = on_connection_lost
+
+        self._transport: asyncio.Transport | None = None
+        self._buffer = b""
+        self._seqno = 1
+        self._waiters: dict[int, deque[asyncio.Future]] = {}
+
+    @property
+    def connected(self) -> bool:
+        return self._transport is not None and not self._transport.is_closing()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        _log.debug("Connection to %s lost: %r", self.device_id, exc)
+        self._transport = None
+        for waiters in self._waiters.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(MoeBotConnectionError("Connection to the device was lost"))
+        self._waiters.clear()
+        self._on_connection_lost(self, exc)
+
+    def data_received(self, data: bytes) -> None:
+        self._buffer += data
+        while self._buffer:
+            # Skip anything before the start of the next frame
+            offsets = [offset for offset in (self._buffer.find(tinytuya.PREFIX_55AA_BIN),
+                                             self._buffer.find(tinytuya.PREFIX_6699_BIN)) if offset >= 0]
+            if not offsets:
+                # Keep the tail of the buffer, in case it is the start of a prefix
+                self._buffer = self._buffer[-3:]
+                return
+            self._buffer = self._buffer[min(offsets):]
+
+            try:
+                header = tinytuya.parse_header(self._buffer)
+            except tinytuya.DecodeError:
+                if len(self._buffer) < _MAX_HEADER_LEN:
+                    return
+                _log.debug("Discarding a corrupt frame header from %s: %r", self.device_id, self._buffer[:20])
+                self._buffer = self._buffer[4:]
+                continue
+
+            if len(self._buffer) < header.total_length:
+                return
+            frame = self._buffer[:header.total_length]
+            self._buffer = self._buffer[header.total_length:]
+            self._frame_received(frame, header)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    def send(self, command: int, dps: dict[str, Any] | None = None) -> None:
+        """Send a command to the device without waiting for a response."""
+        command, payload = self._build_payload(command, dps)
+        self._write(command, payload)
+
+    async def async_request(self, command: int, dps: dict[str, Any] | None = None) -> dict[str, Any] | None:
+        """Send a command to the device and wait for its response."""
+        command, payload = self._build_payload(command, dps)
+        return await self._async_write_and_wait(command, payload)
+
+    async def async_negotiate_session_key(self) -> None:
+        """Agree the session key with a v3.4 or v3.5 device."""
+        self._session_key = self._real_key
+        local_nonce = os.urandom(16)
+
+        response = await self._async_write_and_wait(tinytuya.SESS_KEY_NEG_START, local_nonce)
+        if response and self.version == 3.4:
+            try:
+                response = _cipher(self._real_key).decrypt(response, False, decode_text=False)
+            except ValueError as err:
+                raise MoeBotConnectionError("Session key negotiation failed, the response was invalid") from err
+        if not response or len(response) < 48:
+            raise MoeBotConnectionError("Session key negotiation failed, the response was too short")
+
+        remote_nonce = response[:16]
+        expected_hmac = hmac.new(self._real_key, local_nonce, sha256).digest()
+        if not hmac.compare_digest(expected_hmac, response[16:48]):
+            raise MoeBotConnectionError("Session key negotiation failed, is the local key correct?")
+
+        self._write(tinytuya.SESS_KEY_NEG_FINISH, hmac.new(self._real_key, remote_nonce, sha256).digest())
+
+        key = bytes(a ^ b for a, b in zip(local_nonce, remote_nonce))
+        cipher = _cipher(self._real_key)
+        if self.version == 3.4:
+            self._session_key = cipher.encrypt(key, False, pad=False)
+        else:
+            self._session_key = cipher.encrypt(key, use_base64=False, pad=False, iv=local_nonce[:12])[12:28]
+        _log.debug("Negotiated a session key with %s", self.device_id)
+
+    def _build_payload(self, command: int, dps: dict[str, Any] | None) -> tuple[int, bytes]:
+        """Build the JSON payload for a command, per the Tuya protocol version."""
+        if self.version >= 3.4 and command == tinytuya.CONTROL:
+            command = tinytuya.CONTROL_NEW
+            body = {"protocol": 5, "t": int(time.time()), "data": {"dps": dps}}
+        elif self.version >= 3.4 and command == tinytuya.DP_QUERY:
+            command = tinytuya.DP_QUERY_NEW
+            body = {}
+        elif command == tinytuya.CONTROL:
+            body = {"devId": self.device_id, "uid": self.device_id, "t": str(int(time.time())), "dps": dps}
+        elif command == tinytuya.DP_QUERY:
+            body = {"gwId": self.device_id, "devId": self.device_id, "uid": self.device_id,
+                    "t": str(int(time.time()))}
+        else:
+            body = {"gwId": self.device_id, "devId": self.device_id}
+
+        # The devices don't respond if there are spaces in the JSON
+        return command, json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+    async def _async_write_and_wait(self, command: int, payload: bytes) -> Any:
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(_RESPONSE_COMMANDS.get(command, command), deque())
+        waiters.append(waiter)
+        try:
+            self._write(command, payload)
+            async with asyncio.timeout(RESPONSE_TIMEOUT):
+                return await waiter
+        except TimeoutError as err:
+            raise MoeBotConnectionError(f"No response from the device to command {command}") from err
+        finally:
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+    def _write(self, command: int, payload: bytes) -> None:
+        if not self.connected:
+            raise MoeBotConnectionError("Not connected to the device")
+        self._transport.write(self._encode(command, payload))
+
+    def _encode(self, command: int, payload: bytes) -> bytes:
+        """Add the protocol header, encrypt and frame a payload."""
+        seqno = self._seqno
+        self._seqno += 1
+
+        cipher = _cipher(self._session_key)
+        if self.version >= 3.4:
+            if command not in tinytuya.NO_PROTOCOL_HEADER_CMDS:
+                payload = self._version_header + payload
+            if self.version >= 3.5:
+                msg = tinytuya.TuyaMessage(seqno, command, None, payload, 0, True, tinytuya.PREFIX_6699_VALUE, True)
+                return tinytuya.pack_message(msg, hmac_key=self._session_key)
+            payload = cipher.encrypt(payload, False)
+            hmac_key = self._session_key
+        else:
+            payload = cipher.encrypt(payload, False)
+            if command not in tinytuya.NO_PROTOCOL_HEADER_CMDS:
+                payload = self._version_header + payload
+            hmac_key = None
+
+        msg = tinytuya.TuyaMessage(seqno, command, 0, payload, 0, True, tinytuya.PREFIX_55AA_VALUE, False)
+        return tinytuya.pack_message(msg, hmac_key=hmac_key)
+
+    def _frame_received(self, frame: bytes, header) -> None:
+        hmac_key = self._session_key if self.version >= 3.4 else None
+        try:
+            msg = tinytuya.unpack_message(frame, hmac_key=hmac_key, header=header, no_retcode=False)
+        except (tinytuya.DecodeError, ValueError, TypeError):
+            _log.debug("Unable to unpack a frame from %s: %r", self.device_id, frame, exc_info=True)
+            return
+
+        if msg.prefix == tinytuya.PREFIX_6699_VALUE and not msg.crc_good:
+            _log.debug("Discarding a frame from %s that failed authentication", self.device_id)
+            return
+
+        if msg.cmd == tinytuya.SESS_KEY_NEG_RESP:
+            result = msg.payload
+        else:
+            result = self._decode_payload(msg.payload)
+        _log.debug("Received command %d from %s: %r", msg.cmd, self.device_id, result)
+
+        waiters = self._waiters.get(msg.cmd)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(result)
+                break
+
+        if isinstance(result, dict) and "dps" in result:
+            self._on_message(result, msg.cmd == tinytuya.STATUS)
+
+    def _decode_payload(self, payload: bytes) -> dict[str, Any] | None:
+        """Decrypt and parse the JSON payload of a message."""
+        if not payload:
+            return None
+
+        cipher = _cipher(self._session_key)
+        try:
+            # v3.4 encrypts the version header along with the payload
+            if self.version == 3.4:
+                payload = cipher.decrypt(payload, False, decode_text=False)
+            if payload.startswith(self._version_bytes):
+                payload = payload[len(self._version_header):]
+            # v3.5 payloads have already been decrypted when the frame was unpacked
+            if self.version < 3.4:
+                payload = cipher.decrypt(payload, False, decode_text=False)
+            if not payload:
+                return None
+            result = json.loads(payload)
+        except Exception:
+            _log.debug("Unable to decode a payload from %s: %r", self.device_id, payload, exc_info=True)
+            return None
+
+        if not isinstance(result, dict):
+            return None
+        # v3.4 and above nest the DPS inside the data
+        if "dps" not in result and isinstance(result.get("data"), dict) and "dps" in result["data"]:
+            result["dps"] = result["data"]["dps"]
+        return result
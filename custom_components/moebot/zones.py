@@ -0,0 +1,97 @@
+"""Batches changes to a MoeBot's zone configuration into single writes."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from pymoebot import ZoneConfig
+
+from .const import DPS_ZONES
+from .dispatcher import MoeBotDispatcher
+
+_log = logging.getLogger(__package__)
+
+# How long to gather zone changes before writing them to the MoeBot
+ZONE_WRITE_DELAY = 0.5  # seconds
+
+# The number of values in a zone configuration; a distance and a ratio for each of the five zones
+ZONE_VALUE_COUNT = 10
+
+
+class MoeBotZoneWriter:
+    """Merges the changes made to a MoeBot's zones in a short window into one write.
+
+    The whole zone configuration is a single data point, so every change writes all ten values. Each change is
+    applied on top of the last values written, rather than those last reported by the MoeBot, so that a change made
+    before the MoeBot has acknowledged an earlier write doesn't undo it.
+    """
+
+    def __init__(self, hass: HomeAssistant, dispatcher: MoeBotDispatcher) -> None:
+        self._moebot = dispatcher.moebot
+        self._pending: dict[int, int] = {}
+        self._written: list[int] | None = None
+        # The zones the MoeBot reported when they were last written
+        self._written_over: tuple[int, ...] | None = None
+
+        self._debouncer = Debouncer(hass, _log, cooldown=ZONE_WRITE_DELAY, immediate=False,
+                                    function=self._async_write)
+
+        dispatcher.async_add_listener(self._zones_received, (DPS_ZONES,))
+
+    @property
+    def values(self) -> list[int] | None:
+        """Return the zone values as they will be once the pending changes are written."""
+        if self._written is not None:
+            values = list(self._written)
+        elif self._moebot.zone_values is not None:
+            values = list(self._moebot.zone_values)
+        elif len(self._pending) == ZONE_VALUE_COUNT:
+            values = [0] * ZONE_VALUE_COUNT
+        else:
+            return None
+
+        for index, value in self._pending.items():
+            values[index] = value
+        return values
+
+    async def async_set_value(self, index: int, value: int) -> None:
+        """Change one zone value; it is written along with any others changed in the next moment."""
+        self._pending[index] = value
+        await self._debouncer.async_call()
+
+    async def async_set_values(self, values: Iterable[int]) -> None:
+        """Change all the zone values and write them straight away."""
+        self._pending.update(enumerate(values))
+        self._debouncer.async_cancel()
+        await self._async_write()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop any changes that haven't been written."""
+        self._debouncer.async_shutdown()
+        self._pending.clear()
+
+    async def _async_write(self) -> None:
+        values = self.values
+        if values is None:
+            _log.warning("Zone data hasn't been retrieved, can't change the zones")
+            return
+
+        self._pending.clear()
+        self._written, self._written_over = values, self._moebot.zone_values
+        _log.debug("Writing zones: %r", values)
+        try:
+            await self._moebot.async_set_zones(ZoneConfig(*values))
+        except Exception:
+            self._written = None
+            raise
+
+    @callback
+    def _zones_received(self, raw_msg) -> None:
+        # The zones come with every status, so until the MoeBot has applied the write it keeps reporting the zones it
+        # had before; the write is only done with once it reports the zones written, or has been changed some other way
+        reported = self._moebot.zone_values
+        if self._written is not None and (reported == tuple(self._written) or reported != self._written_over):
+            self._written = None
@@ -0,0 +1,23 @@
+"""Fixtures for the MoeBot tests."""
+from unittest.mock import patch
+
+import pytest
+
+from .fake_device import LOCAL_KEY, FakeMoeBot
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture
+async def moebot(socket_enabled):
+    """A fake MoeBot, that the MoeBots set up connect to."""
+    moebot = FakeMoeBot(LOCAL_KEY)
+    await moebot.start()
+    with patch("custom_components.moebot.device.TUYA_PORT", moebot.port):
+        yield moebot
+    await moebot.stop()
@@ -0,0 +1,171 @@
+"""A fake MoeBot, speaking Tuya protocol 3.3, 3.4 or 3.5 on a local TCP port."""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import os
+from hashlib import sha256
+from typing import Any
+
+import tinytuya
+
+LOCAL_KEY = "0123456789abcdef"
+STATUS = {"6": 80, "101": "STANDBY", "103": "", "104": False, "105": 3,
+          "113": "AAAACjIAAAAUMgAAAAAAAAAAAAAAAAAAAA==", "114": "GeneralMode"}
+
+# The state each of the MoeBot's commands (DPS 115) leaves it in
+COMMAND_STATES = {"StartMowing": "MOWING", "ContinueWork": "MOWING", "PauseWork": "PAUSED", "CancelWork": "STANDBY",
+                  "StartReturnStation": "PARK"}
+
+
+class FakeMoeBot:
+    """Answers heartbeats, status queries and writes, with the MoeBot's data points.
+
+    Writes are acknowledged and then pushed back as a status update, as the MoeBot does. A connection that doesn't
+    speak the fake's version is closed.
+    """
+
+    def __init__(self, local_key: str, dps: dict | None = None, version: float = 3.3) -> None:
+        self._key = local_key.encode()
+        self.dps = dict(STATUS if dps is None else dps)
+        self.version = version
+        self.port: int | None = None
+        self.writers: list[asyncio.StreamWriter] = []
+        self.connections = 0
+        # The commands and payloads received, oldest first
+        self.received: list[tuple[int, Any]] = []
+        # Whether writes are acknowledged and applied
+        self.apply_writes = True
+        self._server: asyncio.Server | None = None
+        self._seqno = 0
+        self._session_key = self._key
+        self._local_nonce = b""
+        self._remote_nonce = os.urandom(16)
+
+    async def start(self) -> int:
+        """Start answering, on the port used before if the fake has been stopped."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port or 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        for writer in list(self.writers):
+            writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def push(self, dps: dict[str, Any]) -> None:
+        """Report a change to the data points, unasked, as the MoeBot does."""
+        self.dps.update(dps)
+        for writer in list(self.writers):
+            writer.write(self._encrypted(tinytuya.STATUS, self._status(dps), True))
+            await writer.drain()
+
+    def _frame(self, command: int, payload: bytes) -> bytes:
+        self._seqno += 1
+        if self.version >= 3.5:
+            msg = tinytuya.TuyaMessage(self._seqno, command, 0, payload, 0, True, tinytuya.PREFIX_6699_VALUE, True)
+            return tinytuya.pack_message(msg, hmac_key=self._session_key)
+        msg = tinytuya.TuyaMessage(self._seqno, command, 0, b"\x00\x00\x00\x00" + payload, 0, True,
+                                   tinytuya.PREFIX_55AA_VALUE, False)
+        return tinytuya.pack_message(msg, hmac_key=self._session_key if self.version >= 3.4 else None)
+
+    def _encrypted(self, command: int, data: dict[str, Any], header: bool) -> bytes:
+        raw = json.dumps(data).encode()
+        version_header = str(self.version).encode() + tinytuya.PROTOCOL_3x_HEADER if header else b""
+        if self.version >= 3.5:
+            # The frame itself is encrypted
+            return self._frame(command, version_header + raw)
+        cipher = tinytuya.AESCipher(self._session_key)
+        if self.version >= 3.4:
+            return self._frame(command, cipher.encrypt(version_header + raw, False))
+        return self._frame(command, version_header + cipher.encrypt(raw, False))
+
+    def _status(self, dps: dict[str, Any]) -> dict[str, Any]:
+        if self.version >= 3.4:
+            return {"protocol": 4, "t": 1700000000, "data": {"dps": dps}}
+        return {"devId": "moebot", "t": 1700000000, "dps": dps}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writers.append(writer)
+        self.connections += 1
+        self._session_key = self._key
+        buffer = b""
+        try:
+            while data := await reader.read(4096):
+                buffer += data
+                while True:
+                    try:
+                        header = tinytuya.parse_header(buffer)
+                    except tinytuya.DecodeError:
+                        break
+                    if len(buffer) < header.total_length:
+                        break
+                    frame, buffer = buffer[:header.total_length], buffer[header.total_length:]
+                    hmac_key = self._session_key if self.version >= 3.4 else None
+                    try:
+                        msg = tinytuya.unpack_message(frame, hmac_key=hmac_key, header=header, no_retcode=True)
+                        await self._reply(writer, msg)
+                    except (ValueError, TypeError, tinytuya.DecodeError):
+                        # Not the version spoken here
+                        return
+        finally:
+            self.writers.remove(writer)
+            writer.close()
+
+    def _negotiate(self, msg) -> bytes | None:
+        """Take part in the session key negotiation of v3.4 and v3.5, returning the reply if there is one."""
+        cipher = tinytuya.AESCipher(self._key)
+        if msg.cmd == tinytuya.SESS_KEY_NEG_START:
+            # v3.4 encrypts the negotiation with the local key, v3.5 encrypts the whole frame
+            self._local_nonce = msg.payload
+            if self.version == 3.4:
+                self._local_nonce = cipher.decrypt(msg.payload, False, decode_text=False)
+            reply = self._remote_nonce + hmac.new(self._key, self._local_nonce, sha256).digest()
+            if self.version == 3.4:
+                reply = cipher.encrypt(reply, False)
+            return self._frame(tinytuya.SESS_KEY_NEG_RESP, reply)
+
+        nonces = bytes(a ^ b for a, b in zip(self._local_nonce, self._remote_nonce))
+        if self.version >= 3.5:
+            self._session_key = cipher.encrypt(nonces, use_base64=False, pad=False, iv=self._local_nonce[:12])[12:28]
+        else:
+            self._session_key = cipher.encrypt(nonces, False, pad=False)
+        return None
+
+    def _decrypt(self, payload: bytes) -> Any:
+        cipher = tinytuya.AESCipher(self._session_key)
+        if self.version == 3.4 and payload:
+            payload = cipher.decrypt(payload, False, decode_text=False)
+        version_header = str(self.version).encode() + tinytuya.PROTOCOL_3x_HEADER
+        if payload.startswith(str(self.version).encode()):
+            payload = payload[len(version_header):]
+        if self.version < 3.4 and payload:
+            payload = cipher.decrypt(payload, False, decode_text=False)
+        return json.loads(payload) if payload else None
+
+    async def _reply(self, writer: asyncio.StreamWriter, msg) -> None:
+        if self.version < 3.4 and msg.cmd in (tinytuya.SESS_KEY_NEG_START, tinytuya.SESS_KEY_NEG_FINISH):
+            raise ValueError("v3.3 has no session key")
+        if msg.cmd in (tinytuya.SESS_KEY_NEG_START, tinytuya.SESS_KEY_NEG_FINISH):
+            if (reply := self._negotiate(msg)) is not None:
+                writer.write(reply)
+                await writer.drain()
+            return
+
+        data = self._decrypt(msg.payload)
+        self.received.append((msg.cmd, data))
+        if msg.cmd == tinytuya.HEART_BEAT:
+            writer.write(self._frame(tinytuya.HEART_BEAT, b""))
+        elif msg.cmd in (tinytuya.DP_QUERY, tinytuya.DP_QUERY_NEW):
+            writer.write(self._encrypted(msg.cmd, self._status(self.dps), False))
+        elif msg.cmd in (tinytuya.CONTROL, tinytuya.CONTROL_NEW) and self.apply_writes:
+            writer.write(self._frame(msg.cmd, b""))
+            await writer.drain()
+            dps = data["data"]["dps"] if "data" in data else data["dps"]
+            changes = {dp: value for dp, value in dps.items() if dp != "115"}
+            if "115" in dps:
+                changes["101"] = COMMAND_STATES.get(dps["115"], self.dps["101"])
+            await self.push(changes)
+        await writer.drain()
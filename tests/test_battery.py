@@ -0,0 +1,31 @@
+"""Tests for the prediction of a MoeBot's battery time remaining and time to full."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.moebot.battery import MoeBotBatteryPredictor
+from custom_components.moebot.dispatcher import MoeBotDispatcher
+
+
+async def test_battery_and_state_together(hass: HomeAssistant) -> None:
+    """A battery reading that comes with a change of state counts for the new state."""
+    listeners = []
+    moebot = MagicMock(id="moebot", available=True, tuya_version=3.3, battery=80, state="STANDBY")
+    moebot.add_listener = lambda listener: listeners.append(listener) or (lambda: None)
+    dispatcher = MoeBotDispatcher(moebot)
+    predictor = MoeBotBatteryPredictor(dispatcher)
+    clock = MagicMock()
+
+    with patch("custom_components.moebot.battery.time", clock):
+        clock.monotonic.return_value = 1000
+        moebot.battery, moebot.state = 79, "MOWING"
+        listeners[0]({"dps": {"6": 79, "101": "MOWING"}})
+
+        clock.monotonic.return_value = 1060
+        moebot.battery = 78
+        listeners[0]({"dps": {"6": 78}})
+
+    # A percent a minute
+    assert predictor.minutes_remaining == pytest.approx(78)
+    predictor.async_shutdown()
@@ -0,0 +1,45 @@
+"""Tests for the queue of writes to a MoeBot's data points."""
+import asyncio
+
+import pytest
+from pymoebot import MoeBotConnectionError
+
+from custom_components.moebot.commands import CommandQueue
+
+
+async def test_writes_merged_per_data_point() -> None:
+    """Writes waiting to the same data point are merged into one, and the data points are written in turn."""
+    written = []
+    queue = CommandQueue(written.append, interval=0.01)
+
+    await asyncio.gather(queue.async_put("105", 1), queue.async_put("104", True), queue.async_put("105", 2),
+                         queue.async_put("105", 3), queue.async_put("103", "x"))
+
+    assert written == [{"105": 3}, {"104": True}, {"103": "x"}]
+    assert queue.depth == 0
+    queue.clear()
+
+
+async def test_writes_spaced_out() -> None:
+    """A write asked for while the last one is being spaced out is sent afterwards, not dropped."""
+    written = []
+    queue = CommandQueue(written.append, interval=0.05)
+
+    await queue.async_put("105", 1)
+    await queue.async_put("105", 2)
+
+    assert written == [{"105": 1}, {"105": 2}]
+    queue.clear()
+
+
+async def test_cleared_writes_fail() -> None:
+    """Everyone waiting for a write that is dropped before it is sent is told."""
+    queue = CommandQueue(lambda dps: None, interval=0.05)
+    await queue.async_put("105", 1)
+    waiting = asyncio.ensure_future(queue.async_put("105", 2))
+    await asyncio.sleep(0)
+
+    queue.clear()
+
+    with pytest.raises(MoeBotConnectionError):
+        await waiting
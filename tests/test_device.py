@@ -0,0 +1,123 @@
+"""Tests for the connection to a MoeBot."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+import tinytuya
+
+from custom_components.moebot.device import RECONNECT_DELAY, RECONNECT_MAX_DELAY, MoeBotDevice
+
+from .fake_device import LOCAL_KEY, STATUS, FakeMoeBot
+
+
+async def _async_settle() -> None:
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.parametrize("version", [3.3, 3.4, 3.5])
+@pytest.mark.parametrize("known", [True, False], ids=["known", "auto"])
+async def test_each_tuya_version(socket_enabled, version: float, known: bool) -> None:
+    """The MoeBot is connected to, reports its status and is driven on each Tuya version, chosen or worked out."""
+    fake = FakeMoeBot(LOCAL_KEY, version=version)
+    await fake.start()
+    with patch("custom_components.moebot.device.TUYA_PORT", fake.port):
+        moebot = MoeBotDevice("moebot", "127.0.0.1", LOCAL_KEY, version if known else None)
+        messages = []
+        moebot.add_listener(messages.append)
+        await moebot.async_connect()
+
+        assert moebot.tuya_version == version
+        assert moebot.online and moebot.battery == 80 and moebot.state == "STANDBY"
+
+        await moebot.async_start()
+        assert moebot.state == "MOWING"
+        await moebot.async_set_mow_time(5)
+        await _async_settle()
+        assert moebot.mow_time == 5
+        await fake.push({"6": 55})
+        await _async_settle()
+        assert moebot.battery == 55
+
+        await moebot.async_unlisten()
+        assert not moebot.online
+        assert messages[-1] == {}
+    await fake.stop()
+
+
+async def test_reconnect_backs_off_with_jitter(socket_enabled) -> None:
+    """Each wait to reconnect is a random part of a delay that doubles with each failure, up to the maximum."""
+    fake = FakeMoeBot(LOCAL_KEY)
+    await fake.start()
+    await fake.stop()
+    randomness = MagicMock()
+    randomness.uniform.return_value = 0
+    with patch("custom_components.moebot.device.TUYA_PORT", fake.port), \
+            patch("custom_components.moebot.device.random", randomness), \
+            patch("custom_components.moebot.device.RESOLVE_AFTER_FAILURES", 100):
+        moebot = MoeBotDevice("moebot", "127.0.0.1", LOCAL_KEY, 3.3)
+        moebot.listen()
+        async with asyncio.timeout(5):
+            while randomness.uniform.call_count < 8:
+                await asyncio.sleep(0.01)
+        await moebot.async_unlisten()
+
+    delays = [RECONNECT_DELAY * 2 ** failures for failures in range(1, 7)] + [RECONNECT_MAX_DELAY] * 2
+    assert [call.args for call in randomness.uniform.call_args_list[:8]] == [
+        (min(delay, RECONNECT_MAX_DELAY) / 2, min(delay, RECONNECT_MAX_DELAY)) for delay in delays]
+
+
+async def test_heard_cuts_reconnect_short_once(socket_enabled) -> None:
+    """Hearing the MoeBot cuts short the wait to reconnect, but only once while it keeps refusing connections at the same
+    address."""
+    fake = FakeMoeBot(LOCAL_KEY)
+    await fake.start()
+    await fake.stop()
+    with patch("custom_components.moebot.device.TUYA_PORT", fake.port), \
+            patch("custom_components.moebot.device.RECONNECT_DELAY", 60):
+        moebot = MoeBotDevice("moebot", "127.0.0.1", LOCAL_KEY, 3.3)
+        moebot.listen()
+        await _async_settle()
+
+        moebot.reconnect_now("127.0.0.1")
+        await _async_settle()
+        # Still refused, so the next beacon from the same address waits out the back off
+        moebot.reconnect_now("127.0.0.1")
+        await fake.start()
+        await _async_settle()
+        assert not moebot.online
+        assert fake.connections == 0
+
+        # Being heard at a new address always does
+        moebot.reconnect_now("localhost")
+        await _async_settle()
+        assert moebot.online
+
+        await moebot.async_unlisten()
+    await fake.stop()
+
+
+async def test_idle_ends_on_push(socket_enabled) -> None:
+    """In idle mode the heartbeat slows while the MoeBot is docked and quiet, until it pushes a message."""
+    fake = FakeMoeBot(LOCAL_KEY, dict(STATUS, **{"101": "CHARGING"}))
+    await fake.start()
+    with patch("custom_components.moebot.device.TUYA_PORT", fake.port), \
+            patch("custom_components.moebot.device.IDLE_AFTER", 1.0), \
+            patch("custom_components.moebot.device.IDLE_HEARTBEAT_INTERVAL", 0.3):
+        moebot = MoeBotDevice("moebot", "127.0.0.1", LOCAL_KEY, 3.3)
+        moebot.configure_heartbeat(0.05, 0.05, idle_mode=True)
+        moebot.listen()
+        await asyncio.sleep(1.2)
+
+        fake.received.clear()
+        await asyncio.sleep(0.9)
+        assert len([command for command, _ in fake.received if command == tinytuya.HEART_BEAT]) <= 4
+
+        # Not a change of state, just the battery charging
+        await fake.push({"6": 81})
+        await asyncio.sleep(0.35)
+        fake.received.clear()
+        await asyncio.sleep(0.4)
+        assert len([command for command, _ in fake.received if command == tinytuya.HEART_BEAT]) >= 5
+
+        await moebot.async_unlisten()
+    await fake.stop()
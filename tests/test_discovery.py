@@ -0,0 +1,75 @@
+"""Tests for the shared cache of the devices heard on the local network."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.moebot.discovery import DISCOVERY_TTL, DiscoveredDevices
+
+DEVICE = {"id": "moebot", "ip": "192.168.1.20", "version": "3.3", "product_key": "moebot"}
+
+
+def _discovered() -> tuple[DiscoveredDevices, MagicMock]:
+    """The cache, with the listening on the network replaced."""
+    discovered = DiscoveredDevices()
+    discovery = discovered._discovery = MagicMock(async_start=AsyncMock())
+    return discovered, discovery
+
+
+async def test_listens_while_acquired() -> None:
+    """The beacons are listened for from the first user acquiring the cache until the last releases it."""
+    discovered, discovery = _discovered()
+
+    await discovered.async_acquire()
+    await discovered.async_acquire()
+    discovered.release()
+    assert discovered.listening
+    discovery.close.assert_not_called()
+
+    discovered.release()
+    assert not discovered.listening
+    discovery.async_start.assert_awaited_once()
+    discovery.close.assert_called_once()
+
+
+async def test_failed_start_not_counted() -> None:
+    """A user whose acquire failed doesn't keep the cache listening; the next user starts it again."""
+    discovered, discovery = _discovered()
+    discovery.async_start.side_effect = OSError("in use")
+
+    with pytest.raises(OSError):
+        await discovered.async_acquire()
+    assert not discovered.listening
+
+    discovery.async_start.side_effect = None
+    await discovered.async_acquire()
+    assert discovered.listening
+    assert discovery.async_start.await_count == 2
+
+
+async def test_requests_while_any_lookup_wants_them() -> None:
+    """Devices are asked to announce themselves from the first lookup wanting it until the last is done."""
+    discovered, discovery = _discovered()
+
+    release_first = discovered.async_request_active()
+    release_second = discovered.async_request_active()
+    release_first()
+    discovery.stop_requests.assert_not_called()
+
+    release_second()
+    discovery.start_requests.assert_called_once()
+    discovery.stop_requests.assert_called_once()
+
+
+async def test_device_forgotten_after_ttl() -> None:
+    """A device is remembered for DISCOVERY_TTL after its last beacon."""
+    discovered, _ = _discovered()
+    clock = MagicMock()
+    with patch("custom_components.moebot.discovery.time", clock):
+        clock.monotonic.return_value = 1000
+        discovered._device_announced(DEVICE)
+
+        clock.monotonic.return_value = 1000 + DISCOVERY_TTL
+        assert discovered.get("moebot") == DEVICE
+        clock.monotonic.return_value = 1000 + DISCOVERY_TTL + 1
+        assert discovered.get("moebot") is None
+        assert discovered.devices() == []
@@ -0,0 +1,45 @@
+"""Tests for the dispatcher that fans a MoeBot's messages out to its listeners."""
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.moebot.dispatcher import MoeBotDispatcher
+
+
+def _dispatcher() -> tuple[MoeBotDispatcher, list]:
+    """A dispatcher for a MoeBot that is available, and the listeners it added to the MoeBot."""
+    listeners = []
+    moebot = MagicMock(id="moebot", available=True)
+    moebot.add_listener = lambda listener: listeners.append(listener) or (lambda: None)
+    return MoeBotDispatcher(moebot), listeners
+
+
+async def test_listeners_called_in_registration_order(hass: HomeAssistant) -> None:
+    """Listeners are called in the order they registered, not the order of the DPS in the message."""
+    dispatcher, listeners = _dispatcher()
+    called = []
+    dispatcher.async_add_listener(lambda msg: called.append("state"), ("101",))
+    dispatcher.async_add_listener(lambda msg: called.append("battery"), ("6",))
+    dispatcher.async_add_listener(lambda msg: called.append("every"))
+    dispatcher.async_add_listener(lambda msg: called.append("zones"), ("113",))
+
+    listeners[0]({"dps": {"6": 79, "101": "MOWING"}})
+
+    assert called == ["state", "battery", "every"]
+
+
+async def test_failing_listener_does_not_stop_the_others(hass: HomeAssistant, caplog) -> None:
+    """A listener that raises is logged, and the listeners after it are still called."""
+    dispatcher, listeners = _dispatcher()
+    called = []
+
+    def fail(msg):
+        raise ValueError("broken")
+
+    dispatcher.async_add_listener(fail, ("6",))
+    dispatcher.async_add_listener(lambda msg: called.append(msg), ("6",))
+
+    listeners[0]({"dps": {"6": 79}})
+
+    assert called == [{"dps": {"6": 79}}]
+    assert "Error updating a listener for MoeBot moebot" in caplog.text
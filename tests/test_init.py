@@ -0,0 +1,121 @@
+"""Tests for setting up and unloading MoeBot config entries."""
+import asyncio
+from datetime import timedelta
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import _TrackPointUTCTime
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.moebot import ACKNOWLEDGE_TIMEOUT
+from custom_components.moebot.const import DOMAIN
+from custom_components.moebot.discovery import DATA_DISCOVERY
+
+from .fake_device import LOCAL_KEY, FakeMoeBot
+
+RELOADS = 10
+
+
+def _entry(hass: HomeAssistant) -> MockConfigEntry:
+    entry = MockConfigEntry(domain=DOMAIN, version=2, unique_id="moebot",
+                            data={"device_id": "moebot", "ip_address": "127.0.0.1", "local_key": LOCAL_KEY,
+                                  "tuya_version": "3.3"})
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _async_wait_online(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    async with asyncio.timeout(5):
+        while not hass.data[DOMAIN][entry.entry_id].moebot.online:
+            await asyncio.sleep(0.02)
+    await hass.async_block_till_done()
+
+
+def _timers(hass: HomeAssistant) -> dict[str, int]:
+    """Count the time trackers and the delayed saves of the MoeBot's stores that are waiting."""
+    handles = [handle for handle in hass.loop._scheduled if not handle.cancelled()]
+    return {
+        "time trackers": sum(isinstance(getattr(handle._callback, "__self__", None), _TrackPointUTCTime)
+                             for handle in handles),
+        "delayed saves": sum(isinstance(store := getattr(handle._callback, "__self__", None), Store)
+                             and store.key.startswith(DOMAIN) for handle in handles),
+    }
+
+
+def _counts(hass: HomeAssistant, entry: MockConfigEntry, moebot: FakeMoeBot) -> dict[str, int]:
+    discovered = hass.data[DATA_DISCOVERY]
+    return {
+        # A store waiting to save listens for the final write, which comes and goes with the saves
+        "bus listeners": sum(count for event_type, count in hass.bus.async_listeners().items()
+                             if event_type != EVENT_HOMEASSISTANT_FINAL_WRITE),
+        "tasks": len(asyncio.all_tasks()),
+        "connections": len(moebot.writers),
+        "discovery listeners": len(discovered._listeners) + sum(map(len, discovered._beacon_listeners.values())),
+        "dispatcher listeners": len(hass.data[DOMAIN][entry.entry_id].dispatcher._listeners),
+        **_timers(hass),
+    }
+
+
+async def test_reload_does_not_leak(hass: HomeAssistant, moebot: FakeMoeBot) -> None:
+    """Reloading an entry leaves no listeners, tasks, connections, timers or saves behind."""
+    started = _timers(hass)
+    entry = _entry(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await _async_wait_online(hass, entry)
+    first = hass.data[DOMAIN][entry.entry_id]
+    before = _counts(hass, entry, moebot)
+
+    for _ in range(RELOADS):
+        assert await hass.config_entries.async_reload(entry.entry_id)
+        await _async_wait_online(hass, entry)
+
+    assert _counts(hass, entry, moebot) == before
+    assert before["connections"] == 1
+    # Nothing is left listening to the MoeBot or the dispatcher of the first setup
+    assert first.dispatcher._listeners == []
+    assert first.moebot._MoeBotDevice__listeners == []
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert _timers(hass) == started
+
+
+async def test_requested_value_acknowledged(hass: HomeAssistant, moebot: FakeMoeBot) -> None:
+    """A requested value is shown as pending until the MoeBot reports it."""
+    entry = _entry(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await _async_wait_online(hass, entry)
+
+    await hass.services.async_call("number", "set_value", {"entity_id": "number.mowing_time", "value": 5},
+                                   blocking=True)
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+
+    state = hass.states.get("number.mowing_time")
+    assert state.state == "5"
+    assert "pending" not in state.attributes
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_requested_value_rolled_back(hass: HomeAssistant, moebot: FakeMoeBot) -> None:
+    """A requested value the MoeBot doesn't acknowledge is replaced by the value it reported after a while."""
+    entry = _entry(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await _async_wait_online(hass, entry)
+    moebot.apply_writes = False
+
+    await hass.services.async_call("number", "set_value", {"entity_id": "number.mowing_time", "value": 5},
+                                   blocking=True)
+    state = hass.states.get("number.mowing_time")
+    assert state.state == "5"
+    assert state.attributes["pending"]
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=ACKNOWLEDGE_TIMEOUT + 1))
+    await hass.async_block_till_done()
+
+    state = hass.states.get("number.mowing_time")
+    assert state.state == "3"
+    assert "pending" not in state.attributes
+    assert await hass.config_entries.async_unload(entry.entry_id)
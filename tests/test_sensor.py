@@ -0,0 +1,22 @@
+"""Tests for the MoeBot's sensors."""
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.moebot.const import DOMAIN
+
+from .fake_device import LOCAL_KEY, STATUS, FakeMoeBot
+from .test_init import _async_wait_online
+
+
+async def test_tuya_version_after_restore(hass: HomeAssistant, hass_storage, moebot: FakeMoeBot) -> None:
+    """The Tuya version worked out is shown, even though the restored MoeBot was available all along."""
+    hass_storage["moebot.moebot"] = {"version": 1, "key": "moebot.moebot", "data": {"dps": STATUS}}
+    entry = MockConfigEntry(domain=DOMAIN, version=2, unique_id="moebot",
+                            data={"device_id": "moebot", "ip_address": "127.0.0.1", "local_key": LOCAL_KEY,
+                                  "tuya_version": "auto"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await _async_wait_online(hass, entry)
+
+    assert hass.states.get("sensor.tuya_protocol_version").state == "3.3"
+    assert await hass.config_entries.async_unload(entry.entry_id)
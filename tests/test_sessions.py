@@ -0,0 +1,50 @@
+"""Tests for the tracking of a MoeBot's mowing sessions."""
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.moebot.sessions import MoeBotSessionTracker
+
+STARTED = 1_700_000_000
+LAST_SEEN = STARTED + 1800
+
+
+async def _async_tracker(hass: HomeAssistant, state: str) -> tuple[MoeBotSessionTracker, list, MagicMock]:
+    """A tracker for a MoeBot restored in the given state, and the listeners it added to the dispatcher."""
+    listeners = []
+    moebot = MagicMock(id="moebot", state=state, battery=60, online=False)
+    dispatcher = MagicMock(moebot=moebot)
+    dispatcher.async_add_listener = lambda listener, dps=None: listeners.append(listener) or (lambda: None)
+    tracker = MoeBotSessionTracker(hass, dispatcher)
+    await tracker.async_load()
+    return tracker, listeners, moebot
+
+
+async def test_restored_state_starts_no_session(hass: HomeAssistant) -> None:
+    """A MoeBot restored while mowing doesn't start a session when it fails to connect."""
+    tracker, listeners, _ = await _async_tracker(hass, "MOWING")
+
+    listeners[0]({})
+
+    assert tracker.current is None
+    tracker.async_shutdown()
+
+
+async def test_session_ended_while_stopped(hass: HomeAssistant, hass_storage) -> None:
+    """A session that ended while Home Assistant was stopped ends when it was last seen, not when the MoeBot is next
+    heard from."""
+    hass_storage["moebot.moebot.sessions"] = {
+        "version": 1, "key": "moebot.moebot.sessions",
+        "data": {"sessions": [], "current": {"start": STARTED, "last_seen": LAST_SEEN, "battery_start": 90}},
+    }
+    tracker, listeners, moebot = await _async_tracker(hass, "MOWING")
+
+    moebot.state, moebot.online = "CHARGING", True
+    listeners[0]({"dps": {"101": "CHARGING"}})
+
+    assert tracker.current is None
+    assert tracker.sessions[0]["end"] == LAST_SEEN
+    assert tracker.sessions[0]["end"] < dt_util.utcnow().timestamp()
+    assert tracker.sessions[0]["battery_used"] == 30
+    tracker.async_shutdown()
@@ -0,0 +1,25 @@
+"""Tests for the stored snapshot of a MoeBot."""
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.moebot.snapshot import SNAPSHOT_SAVE_DELAY, MoeBotSnapshotStore
+
+
+async def test_saved_while_messages_arrive(hass: HomeAssistant, hass_storage, freezer) -> None:
+    """The snapshot is saved SNAPSHOT_SAVE_DELAY after the first message, even though more keep arriving."""
+    listeners = []
+    moebot = MagicMock(snapshot={"dps": {"6": 80}})
+    moebot.add_listener = lambda listener: listeners.append(listener) or (lambda: None)
+    MoeBotSnapshotStore(hass, "moebot").async_track(moebot)
+
+    # A message every half a save delay
+    for battery in (80, 79, 78):
+        moebot.snapshot = {"dps": {"6": battery}}
+        listeners[0]({"dps": {"6": battery}})
+        freezer.tick(SNAPSHOT_SAVE_DELAY / 2 + 1)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    assert hass_storage["moebot.moebot"]["data"] == {"dps": {"6": 79}}
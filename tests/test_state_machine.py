@@ -0,0 +1,47 @@
+"""Tests for the state machine that plans the commands to move a MoeBot between states."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.moebot.state_machine import MoeBotStateMachine
+
+
+def _state_machine(state: str) -> tuple[MoeBotStateMachine, MagicMock]:
+    moebot = MagicMock(state=state, async_start=AsyncMock(), async_pause=AsyncMock(), async_cancel=AsyncMock(),
+                       async_dock=AsyncMock())
+    return MoeBotStateMachine(MagicMock(moebot=moebot)), moebot
+
+
+async def test_shortest_path_fires_the_planned_triggers(hass: HomeAssistant) -> None:
+    """Getting from PAUSED to PARK cancels the work and then sends the MoeBot back to its dock."""
+    state_machine, moebot = _state_machine("PAUSED")
+
+    assert state_machine._trigger_plan[("PAUSED", "PARK")] == ("CancelWork", "StartReturnStation")
+    await state_machine.shortest_path("PARK")
+
+    moebot.async_cancel.assert_awaited_once()
+    moebot.async_dock.assert_awaited_once()
+    moebot.async_start.assert_not_awaited()
+    assert state_machine.state == "PARK"
+
+
+async def test_unreachable_state(hass: HomeAssistant) -> None:
+    """A state that can't be reached from the current one is an error, and nothing is sent to the MoeBot."""
+    state_machine, moebot = _state_machine("ERROR")
+
+    with pytest.raises(HomeAssistantError):
+        await state_machine.shortest_path("MOWING")
+    moebot.async_start.assert_not_awaited()
+
+
+async def test_plan_rebuilt_when_transitions_change(hass: HomeAssistant) -> None:
+    """A transition added after the plan was built is planned with."""
+    state_machine, moebot = _state_machine("ERROR")
+
+    state_machine.add_transition("Reset", "ERROR", "STANDBY")
+    await state_machine.shortest_path("MOWING")
+
+    moebot.async_start.assert_awaited_once()
+    assert state_machine.state == "MOWING"
@@ -0,0 +1,44 @@
+"""Tests for the hourly long-term statistics of a MoeBot."""
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.moebot.statistics import MoeBotStatistics
+
+HOUR = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+
+
+async def test_hour_added(hass: HomeAssistant, freezer) -> None:
+    """The battery weighted by time, its range and the minutes mown are added for the hour that has ended."""
+    freezer.move_to(HOUR)
+    listeners = []
+    moebot = MagicMock(id="MoeBot", battery=80, state="STANDBY")
+    dispatcher = MagicMock(moebot=moebot)
+    dispatcher.async_add_listener = lambda listener, dps=None: listeners.append(listener) or (lambda: None)
+    statistics = MoeBotStatistics(hass, dispatcher)
+
+    freezer.move_to(HOUR.replace(minute=30))
+    moebot.battery, moebot.state = 60, "MOWING"
+    listeners[0]({"dps": {"6": 60, "101": "MOWING"}})
+
+    with patch("homeassistant.components.recorder.statistics.async_add_external_statistics") as add:
+        freezer.move_to(HOUR.replace(hour=11))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    (battery_metadata, battery), (mowing_metadata, mowing) = [call.args[1:] for call in add.call_args_list]
+    assert battery_metadata["statistic_id"] == "moebot:battery_moebot"
+    assert battery == [{"start": HOUR, "mean": 70, "min": 60, "max": 80}]
+    assert mowing_metadata["statistic_id"] == "moebot:mowing_time_moebot"
+    assert mowing == [{"start": HOUR, "state": 30, "sum": 30}]
+    statistics.async_shutdown()
+
+
+def test_recorder_imported_lazily() -> None:
+    """The module doesn't import the recorder, as it is imported with the integration whether it is loaded or not."""
+    from custom_components.moebot import statistics
+
+    assert not {"get_instance", "async_add_external_statistics", "get_last_statistics", "StatisticData",
+                "StatisticMetaData"} & set(vars(statistics))
@@ -0,0 +1,46 @@
+"""Tests for the batching of changes to a MoeBot's zones."""
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.moebot.zones import MoeBotZoneWriter
+
+BEFORE = (10, 50, 20, 50, 0, 0, 0, 0, 0, 0)
+WRITTEN = [11, 40, 20, 50, 30, 10, 0, 0, 0, 0]
+
+
+def _zone_writer(hass: HomeAssistant) -> tuple[MoeBotZoneWriter, list, MagicMock]:
+    """A zone writer for a MoeBot with the BEFORE zones, and the listeners it added to the dispatcher."""
+    listeners = []
+    moebot = MagicMock(zone_values=BEFORE, async_set_zones=AsyncMock())
+    dispatcher = MagicMock(moebot=moebot)
+    dispatcher.async_add_listener = lambda listener, dps=None: listeners.append(listener) or (lambda: None)
+    return MoeBotZoneWriter(hass, dispatcher), listeners, moebot
+
+
+async def test_change_made_before_write_applied(hass: HomeAssistant) -> None:
+    """A change made while the MoeBot still reports the zones it had before a write is made on top of the write."""
+    zones, listeners, moebot = _zone_writer(hass)
+    await zones.async_set_values(WRITTEN)
+
+    # A status sent before the MoeBot applied the write
+    listeners[0]({"dps": {"113": "before"}})
+    await zones.async_set_value(0, 12)
+
+    assert zones.values == [12] + WRITTEN[1:]
+    zones.async_shutdown()
+
+
+async def test_done_with_write_once_reported(hass: HomeAssistant) -> None:
+    """Once the MoeBot reports the zones written, changes are made on top of what it reports."""
+    zones, listeners, moebot = _zone_writer(hass)
+    await zones.async_set_values(WRITTEN)
+
+    moebot.zone_values = tuple(WRITTEN)
+    listeners[0]({"dps": {"113": "written"}})
+    # Changed on the MoeBot itself
+    moebot.zone_values = BEFORE
+    listeners[0]({"dps": {"113": "before"}})
+
+    assert zones.values == list(BEFORE)
+    zones.async_shutdown()